@@ -1,27 +1,172 @@
+import argparse
+import asyncio
+import csv
+from urllib.parse import urlparse
+
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from PIL import ImageFile
+
+from page_extract import parse_page
+from site_crawler import SiteCrawler
 
 # Target URL
 url = "https://yourweb.com"
-domain = urlparse(url).netloc
-
-# Fetch webpage
-response = requests.get(url)
-soup = BeautifulSoup(response.text, "html.parser")
-
-# Extract image URLs only from the same domain
-img_urls = []
-for img in soup.find_all("img"):
-    src = img.get("src")
-    if src:
-        src = urljoin(url, src)  # Convert relative URLs to absolute
-        # Keep only images from the same domain
-        if urlparse(src).netloc == domain:
-            img_urls.append(src)
-
-# Print all image URLs
-for i, img_url in enumerate(img_urls, 1):
-    print(f"{i}: {img_url}")
-
-print(f"\nTotal images found from {domain}: {len(img_urls)}")
+
+# Audit mode settings
+PROBE_CONCURRENCY = 32
+PROBE_BYTES = 64 * 1024          # ranged GET size; enough for the header of almost any image
+OVERSIZE_FACTOR = 2.0            # intrinsic width > 2x the width attribute = oversized
+MAX_INTRINSIC_WIDTH = 2560       # anything wider is oversized regardless of markup
+LEGACY_FORMAT_SAVING = 0.3       # rough saving from serving JPEG/PNG/GIF as WebP/AVIF
+
+
+def extract_images(page_url):
+    """Same-domain image URLs on one page (original single-page mode)."""
+    domain = urlparse(page_url).netloc
+    response = requests.get(page_url)
+    page = parse_page(response.content, base_url=page_url)  # src already absolute
+    return [img["src"] for img in page.images if urlparse(img["src"]).netloc == domain]
+
+
+def read_dimensions(data):
+    """Width/height from the first bytes of an image, without a full download."""
+    parser = ImageFile.Parser()
+    try:
+        parser.feed(data)
+    except Exception:
+        return None, None, None
+    if parser.image is None:
+        return None, None, None
+    return parser.image.width, parser.image.height, parser.image.format
+
+
+async def probe_image(session, sem, img_url):
+    """Content-Length via HEAD, then a ranged GET for the header bytes."""
+    info = {"bytes": None, "width": None, "height": None, "format": None, "error": None}
+    async with sem:
+        try:
+            async with session.head(img_url, allow_redirects=True) as resp:
+                if resp.status < 400 and resp.content_length:
+                    info["bytes"] = resp.content_length
+            async with session.get(img_url, headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"}) as resp:
+                if resp.status >= 400:
+                    info["error"] = f"HTTP {resp.status}"
+                    return img_url, info
+                head = await resp.content.read(PROBE_BYTES)
+                if info["bytes"] is None:
+                    content_range = resp.headers.get("Content-Range", "")   # "bytes 0-65535/123456"
+                    if "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+                        info["bytes"] = int(content_range.rsplit("/", 1)[1])
+                    elif resp.status == 200:
+                        info["bytes"] = resp.content_length or len(head)
+            info["width"], info["height"], info["format"] = read_dimensions(head)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            info["error"] = str(e) or type(e).__name__
+    return img_url, info
+
+
+async def probe_all(img_urls):
+    sem = asyncio.Semaphore(PROBE_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=30)
+    connector = aiohttp.TCPConnector(limit=PROBE_CONCURRENCY, limit_per_host=8)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        results = await asyncio.gather(*(probe_image(session, sem, u) for u in img_urls))
+    return dict(results)
+
+
+def estimate_saving(usage, info):
+    """Rough bytes saved by resizing to the displayed width and/or a modern format."""
+    size = info["bytes"] or 0
+    if not size or not info["width"]:
+        return 0
+    target = size
+    try:
+        shown = int(usage["width"]) if usage["width"] else None
+    except ValueError:
+        shown = None
+    if shown and info["width"] > shown * OVERSIZE_FACTOR:
+        target *= (shown * OVERSIZE_FACTOR / info["width"]) ** 2
+    elif info["width"] > MAX_INTRINSIC_WIDTH:
+        target *= (MAX_INTRINSIC_WIDTH / info["width"]) ** 2
+    if (info["format"] or "").upper() in ("JPEG", "PNG", "GIF"):
+        target *= 1 - LEGACY_FORMAT_SAVING
+    return int(size - target)
+
+
+def audit(start_urls, max_pages, out_prefix="image_audit"):
+    """Crawl pages, dedupe images globally, probe each once, report the heaviest."""
+    usages = {}     # img_url -> list of {page, width, srcset, loading}
+    domains = {urlparse(u).netloc for u in start_urls}
+
+    crawler = SiteCrawler(start_urls, max_pages=max_pages)
+
+    @crawler.register
+    def collect(page_url, html, page):
+        for img in page.images:
+            if urlparse(img["src"]).netloc in domains:
+                usages.setdefault(img["src"], []).append({
+                    "page": page_url, "width": img["width"],
+                    "srcset": bool(img["srcset"]), "loading": (img["loading"] or "").lower(),
+                })
+
+    asyncio.run(crawler.run())
+    print(f"Probing {len(usages)} unique images...")
+    probes = asyncio.run(probe_all(list(usages)))
+
+    image_rows, page_savings = [], {}
+    for img_url, uses in usages.items():
+        info = probes[img_url]
+        oversized = bool(info["width"]) and (info["width"] > MAX_INTRINSIC_WIDTH or any(
+            u["width"] and u["width"].isdigit() and info["width"] > int(u["width"]) * OVERSIZE_FACTOR for u in uses))
+        for u in uses:
+            saving = estimate_saving(u, info)
+            totals = page_savings.setdefault(u["page"], {"images": 0, "bytes": 0, "potential_saving": 0})
+            totals["images"] += 1
+            totals["bytes"] += info["bytes"] or 0
+            totals["potential_saving"] += saving
+        image_rows.append({
+            "image_url": img_url, "bytes": info["bytes"], "width": info["width"], "height": info["height"],
+            "format": info["format"], "pages": len(uses), "oversized": oversized,
+            "missing_srcset": not any(u["srcset"] for u in uses),
+            "missing_lazy": not any(u["loading"] == "lazy" for u in uses),
+            "error": info["error"],
+        })
+    image_rows.sort(key=lambda r: -(r["bytes"] or 0))
+
+    with open(f"{out_prefix}_images.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(image_rows[0].keys()) if image_rows else ["image_url"])
+        writer.writeheader()
+        writer.writerows(image_rows)
+    with open(f"{out_prefix}_pages.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["page", "images", "bytes", "potential_saving"])
+        for page_url, p in sorted(page_savings.items(), key=lambda kv: -kv[1]["potential_saving"]):
+            writer.writerow([page_url, p["images"], p["bytes"], p["potential_saving"]])
+
+    print("\nHeaviest images:")
+    for row in image_rows[:20]:
+        flags = [name for name in ("oversized", "missing_srcset", "missing_lazy") if row[name]]
+        print(f"  {row['bytes'] or '?':>10}  {row['width']}x{row['height']}  {row['image_url']}  {' '.join(flags)}")
+    total = sum(p["potential_saving"] for p in page_savings.values())
+    print(f"\nPotential savings: {total:,} bytes across {len(page_savings)} pages → {out_prefix}_*.csv")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="List same-domain images, or audit image weight across a site")
+    p.add_argument("urls", nargs="*", default=[url])
+    p.add_argument("--audit", action="store_true", help="Crawl from the URLs and rank images by bytes")
+    p.add_argument("--max-pages", type=int, default=500)
+    args = p.parse_args()
+
+    if args.audit:
+        audit(args.urls, args.max_pages)
+    else:
+        for page_url in args.urls:
+            img_urls = extract_images(page_url)
+
+            # Print all image URLs
+            for i, img_url in enumerate(img_urls, 1):
+                print(f"{i}: {img_url}")
+
+            print(f"\nTotal images found from {urlparse(page_url).netloc}: {len(img_urls)}")
@@ -1,64 +1,130 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# ====== 1. BACA CSV ======
-df = pd.read_csv(r"your-file-path-download-from-gsc.csv")
+# ====== 0. SETTING ======
+INPUT_PATH = r"your-file-path-download-from-gsc.csv"    # .csv atau .parquet (export pukal)
+OUTPUT_PATH = r"C:\Users\syede\Downloads\pos_keywords.csv"
+CHUNK_ROWS = 1_000_000      # baris per chunk: memory ikut saiz chunk, bukan saiz fail
+TOP_N = 10
+PREVIEW_ROWS = 50           # berapa keyword padanan dipaparkan (semua tetap disimpan ke OUTPUT_PATH)
 
-print("==== Info Data ====")
-print(df.info())
-print("\n==== 5 Baris Pertama ====")
-print(df.head())
-
-# 🔧 Pastikan nama kolum sesuai (tukar ikut CSV sebenar)
-# Contoh kalau dari Google Search Console:
-# 'Top queries' -> 'keyword'
-# 'Impressions' -> 'impressions'
-# 'Clicks' -> 'clicks'
-# 'Date' -> 'date'
+# Senarai pattern (regex) keyword yang nak dicari, semua dipadankan dalam satu pass
+TERMS = [r"\bpos\b", r"point of sale"]
 
 # Cuba rename automatik kalau match kolum standard GSC
-df = df.rename(columns={
+RENAME = {
     'Top queries': 'keyword',
     'Query': 'keyword',
     'Impressions': 'impressions',
     'Clicks': 'clicks',
     'Date': 'date'
-})
+}
+# Keyword & tarikh banyak berulang: category jimat memory dan regex/parse hanya dibuat pada nilai unik
+DTYPES = {'keyword': 'category', 'impressions': 'float64', 'clicks': 'float64', 'date': 'category'}
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield chunks with standard column names and explicit dtypes (only the columns we use)."""
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        source = {c: RENAME.get(c, c) for c in pf.schema_arrow.names if RENAME.get(c, c) in DTYPES}
+        for batch in pf.iter_batches(batch_size=chunk_rows, columns=list(source)):
+            chunk = batch.to_pandas().rename(columns=source)
+            yield chunk.astype({c: DTYPES[c] for c in chunk.columns})
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        source = {c: RENAME.get(c, c) for c in header if RENAME.get(c, c) in DTYPES}
+        reader = pd.read_csv(path, usecols=list(source), chunksize=chunk_rows,
+                             dtype={c: DTYPES[name] for c, name in source.items()})
+        for chunk in reader:
+            yield chunk.rename(columns=source)
+
+
+def top_rows(current, chunk, column, n):
+    """Running top-n: nlargest on (previous top + this chunk), never a full sort."""
+    best = chunk.nlargest(n, column).astype({'keyword': str})
+    if current is not None:
+        best = pd.concat([current, best], ignore_index=True).nlargest(n, column)
+    return best.reset_index(drop=True)
+
+
+def match_terms(keywords, pattern):
+    """Boolean mask per row; the regex runs once per unique keyword in the chunk, not per row."""
+    hit = np.zeros(len(keywords.cat.categories) + 1, dtype=bool)     # slot terakhir: NaN (code -1)
+    hit[:-1] = keywords.cat.categories.astype(str).str.contains(pattern, case=False, regex=True)
+    return hit[keywords.cat.codes.to_numpy()]
+
+
+def monthly_rollup(chunk):
+    """Impressions/clicks per month for one chunk: sum per date code first, then map dates to months."""
+    by_date = chunk.groupby(chunk['date'].cat.codes.to_numpy())[['impressions', 'clicks']].sum()
+    by_date = by_date[by_date.index >= 0]
+    dates = pd.to_datetime(chunk['date'].cat.categories[by_date.index].astype(str), errors='coerce')
+    by_date.index = dates.to_period('M')
+    return by_date.groupby(level=0).sum()
+
+
+# ====== 1. BACA DATA (chunk demi chunk) ======
+pattern = "|".join(f"(?:{t})" for t in TERMS)
+top_impressions = top_clicks = top_matches = monthly = None
+rows = matched = 0
+
+for i, chunk in enumerate(read_chunks(INPUT_PATH)):
+    if i == 0:
+        print("==== Info Data (chunk pertama) ====")
+        chunk.info()
+        print("\n==== 5 Baris Pertama ====")
+        print(chunk.head())
+    rows += len(chunk)
+
+    # ====== 2. TOP IMPRESSIONS & CLICKS ======
+    top_impressions = top_rows(top_impressions, chunk, 'impressions', TOP_N)
+    top_clicks = top_rows(top_clicks, chunk, 'clicks', TOP_N)
+
+    # ====== 3. BAHAGI MENGIKUT BULAN (rollup bertambah setiap chunk) ======
+    if 'date' in chunk:
+        part = monthly_rollup(chunk)
+        monthly = part if monthly is None else monthly.add(part, fill_value=0)
+
+    # ====== 4. KEYWORD PADAN TERMS (disimpan terus ke fail, tak dikumpul dalam memory) ======
+    hits = chunk[match_terms(chunk['keyword'], pattern)]
+    if len(hits):
+        hits.to_csv(OUTPUT_PATH, mode='w' if matched == 0 else 'a', header=matched == 0, index=False)
+        top_matches = top_rows(top_matches, hits, 'impressions', PREVIEW_ROWS)
+        matched += len(hits)
+
+print(f"\n{rows:,} baris dibaca")
 
-# ====== 2. TOP IMPRESSIONS & CLICKS ======
 print("\n==== Top 10 by Impressions ====")
-print(df.sort_values(by='impressions', ascending=False).head(10)[['keyword', 'impressions', 'clicks']])
+if top_impressions is not None:
+    print(top_impressions[['keyword', 'impressions', 'clicks']])
 
 print("\n==== Top 10 by Clicks ====")
-print(df.sort_values(by='clicks', ascending=False).head(10)[['keyword', 'impressions', 'clicks']])
-
-# ====== 3. BAHAGI MENGIKUT BULAN ======
-df['date'] = pd.to_datetime(df['date'], errors='coerce')
-df['month'] = df['date'].dt.to_period('M')
-
-monthly = df.groupby('month')[['impressions', 'clicks']].sum().reset_index()
-print("\n==== Data Bulanan ====")
-print(monthly)
-
-plt.figure(figsize=(10,6))
-plt.plot(monthly['month'].astype(str), monthly['impressions'], marker='o', label='Impressions')
-plt.plot(monthly['month'].astype(str), monthly['clicks'], marker='o', label='Clicks')
-plt.title("Impressions & Clicks by Month")
-plt.xlabel("Month")
-plt.ylabel("Count")
-plt.legend()
-plt.grid(True)
-plt.tight_layout()
-plt.show()
-
-# ====== 4. KEYWORD ADA 'POS' ATAU 'POINT OF SALE' ======
-mask = df['keyword'].astype(str).str.contains(r'\bpos\b|point of sale', case=False, na=False)
-pos_keywords = df[mask].sort_values(by='impressions', ascending=False)
-
-print("\n==== Keyword mengandungi 'pos' atau 'point of sale' ====")
-print(pos_keywords[['keyword', 'impressions', 'clicks']])
-
-# ====== 5. (Opsyenal) SIMPAN KE FAIL BARU ======
-output_path = r"C:\Users\syede\Downloads\pos_keywords.csv"
-pos_keywords.to_csv(output_path, index=False)
-print(f"\n✅ Disimpan ke: {output_path}")
+if top_clicks is not None:
+    print(top_clicks[['keyword', 'impressions', 'clicks']])
+
+if monthly is not None:
+    monthly = monthly.sort_index().rename_axis('month').reset_index()
+    print("\n==== Data Bulanan ====")
+    print(monthly)
+
+    plt.figure(figsize=(10,6))
+    plt.plot(monthly['month'].astype(str), monthly['impressions'], marker='o', label='Impressions')
+    plt.plot(monthly['month'].astype(str), monthly['clicks'], marker='o', label='Clicks')
+    plt.title("Impressions & Clicks by Month")
+    plt.xlabel("Month")
+    plt.ylabel("Count")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.show()
+
+print(f"\n==== Keyword padan {TERMS} ({matched:,} baris, top {PREVIEW_ROWS}) ====")
+if top_matches is not None:
+    print(top_matches[['keyword', 'impressions', 'clicks']])
+
+# ====== 5. FAIL PADANAN ======
+if matched:
+    print(f"\n✅ Disimpan ke: {OUTPUT_PATH}")
@@ -0,0 +1,186 @@
+"""
+gsc_extract.py
+Search Console (Search Analytics) extractor backed by a partitioned Parquet store.
+
+- The API client is built once per extractor; each worker thread gets its own
+  authorized HTTP object because httplib2 connections are not thread-safe.
+- The date range is split into one request series per day, paged with
+  rowLimit/startRow until a short page comes back, so the 25,000-row cap of a
+  single call no longer truncates results. Days are fetched in parallel.
+- A shared rate limiter keeps requests under the per-minute quota; 429 and 5xx
+  responses are retried with exponential backoff and jitter.
+- Each finished day is written to
+  <store>/<site>/<dimensions>/date=YYYY-MM-DD/part-0.parquet, so later runs only
+  fetch days that are missing (plus the last REFRESH_DAYS, which Search Console
+  still revises). A day that fails is simply fetched again on the next run.
+
+Usage:
+  from gsc_extract import GSCExtractor, read_store
+  GSCExtractor("https://example.com/", credentials, dimensions=["query", "page"]).sync("2024-01-01", "2024-03-31")
+  df = read_store("https://example.com/", ["query", "page"], "2024-01-01", "2024-03-31")
+
+To run against a local fake of the API, pass api_endpoint="http://127.0.0.1:PORT/"
+and google.auth.credentials.AnonymousCredentials(); the fake only has to answer
+POST /webmasters/v3/sites/<site>/searchAnalytics/query.
+"""
+import datetime
+import os
+import random
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import httplib2
+import pandas as pd
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+STORE_DIR = os.environ.get("SEO_GSC_STORE_DIR", "gsc_data")
+ROW_LIMIT = 25_000                # API maximum per request
+WORKERS = 4
+QUERIES_PER_MINUTE = 600          # per-site quota is 1,200/min; leave room for other tools
+MAX_RETRIES = 6
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REFRESH_DAYS = 3                  # days this close to today are refetched on every run
+METRICS = ["clicks", "impressions", "ctr", "position"]
+
+
+class RateLimiter:
+    """Spaces call starts evenly across threads: at most `per_minute` per minute."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def partition_dir(site_url, dimensions, store_dir=STORE_DIR):
+    site = re.sub(r"[^A-Za-z0-9.-]+", "_", site_url).strip("_")
+    return os.path.join(store_dir, site, "-".join(dimensions))
+
+
+def _days(start, end):
+    day, end = datetime.date.fromisoformat(str(start)), datetime.date.fromisoformat(str(end))
+    while day <= end:
+        yield day.isoformat()
+        day += datetime.timedelta(days=1)
+
+
+def _frame(rows, dimensions):
+    """API rows -> DataFrame with fixed dtypes, so empty and full days share one schema."""
+    data = {dim: [r["keys"][i] for r in rows] for i, dim in enumerate(dimensions)}
+    data.update({m: [r.get(m, 0) for r in rows] for m in METRICS})
+    return pd.DataFrame(data).astype({**{d: str for d in dimensions}, **{m: "float64" for m in METRICS}})
+
+
+class GSCExtractor:
+    def __init__(self, site_url, credentials, dimensions=("query", "page"), search_type="web",
+                 store_dir=STORE_DIR, workers=WORKERS, queries_per_minute=QUERIES_PER_MINUTE,
+                 api_endpoint=None):
+        self.site_url = site_url
+        self.credentials = credentials
+        self.dimensions = list(dimensions)
+        self.search_type = search_type
+        self.workers = workers
+        self.root = partition_dir(site_url, self.dimensions, store_dir)
+        self.limiter = RateLimiter(queries_per_minute)
+        self._local = threading.local()
+        client_options = {"api_endpoint": api_endpoint} if api_endpoint else None
+        self.service = build("searchconsole", "v1", credentials=credentials,
+                             client_options=client_options, cache_discovery=False)
+
+    def _http(self):
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=60))
+        return http
+
+    def _query(self, body):
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.wait()
+            try:
+                request = self.service.searchanalytics().query(siteUrl=self.site_url, body=body)
+                return request.execute(http=self._http())
+            except HttpError as e:
+                if e.resp.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    raise
+            except (OSError, httplib2.HttpLib2Error):
+                self._local.http = None          # drop the broken connection
+                if attempt == MAX_RETRIES:
+                    raise
+            time.sleep(min(60, 2 ** attempt) * (0.5 + random.random()))
+
+    def fetch_day(self, day):
+        """All rows for one day, paged until the API returns a short page."""
+        rows, start_row = [], 0
+        while True:
+            page = self._query({
+                "startDate": day, "endDate": day, "dimensions": self.dimensions,
+                "type": self.search_type, "rowLimit": ROW_LIMIT, "startRow": start_row,
+            }).get("rows", [])
+            rows.extend(page)
+            if len(page) < ROW_LIMIT:
+                return _frame(rows, self.dimensions)
+            start_row += ROW_LIMIT
+
+    def _day_path(self, day):
+        return os.path.join(self.root, f"date={day}")
+
+    def _write_day(self, day, frame):
+        # Dot-prefixed temp dir: Parquet dataset readers skip it if a run dies mid-write
+        tmp = os.path.join(self.root, f".date={day}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        frame.to_parquet(os.path.join(tmp, "part-0.parquet"), index=False)
+        shutil.rmtree(self._day_path(day), ignore_errors=True)
+        os.replace(tmp, self._day_path(day))
+
+    def sync(self, start_date, end_date):
+        """Fetch every day in [start_date, end_date] that is missing or recent. Returns a summary."""
+        os.makedirs(self.root, exist_ok=True)
+        recent = (datetime.date.today() - datetime.timedelta(days=REFRESH_DAYS)).isoformat()
+        days = list(_days(start_date, end_date))
+        todo = [d for d in days if d >= recent or not os.path.exists(self._day_path(d))]
+        summary = {"stored": len(days) - len(todo), "fetched": 0, "rows": 0, "failed": []}
+        print(f"{self.site_url}: {len(todo)} of {len(days)} days to fetch")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.fetch_day, day): day for day in todo}
+            for fut in as_completed(futures):
+                day = futures[fut]
+                try:
+                    frame = fut.result()
+                except Exception as e:
+                    print(f"  {day}: failed ({e}); will be retried on the next run")
+                    summary["failed"].append(day)
+                    continue
+                self._write_day(day, frame)
+                summary["fetched"] += 1
+                summary["rows"] += len(frame)
+        print(f"  {summary['fetched']} days fetched ({summary['rows']:,} rows), "
+              f"{summary['stored']} already stored, {len(summary['failed'])} failed")
+        return summary
+
+
+def read_store(site_url, dimensions, start_date=None, end_date=None, columns=None, store_dir=STORE_DIR):
+    """Stored rows for a date range as one DataFrame, with a 'date' column from the partition."""
+    root = partition_dir(site_url, list(dimensions), store_dir)
+    days = sorted(name[5:] for name in (os.listdir(root) if os.path.isdir(root) else [])
+                  if name.startswith("date="))
+    days = [d for d in days if (not start_date or d >= str(start_date)) and (not end_date or d <= str(end_date))]
+    frames = [pd.read_parquet(os.path.join(root, f"date={d}", "part-0.parquet"), columns=columns).assign(date=d)
+              for d in days]
+    if not frames:
+        return pd.DataFrame(columns=(columns or list(dimensions) + METRICS) + ["date"])
+    return pd.concat(frames, ignore_index=True)
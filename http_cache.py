@@ -0,0 +1,202 @@
+"""
+http_cache.py
+Shared on-disk HTTP response cache for the fetch helpers in this repo.
+
+- Bodies are stored zlib-compressed under their SHA-256 (content-addressed,
+  so identical pages on different URLs are stored once).
+- A small SQLite index maps URL -> ETag / Last-Modified / body hash.
+- Fresh entries (younger than TTL) are served without touching the network;
+  stale entries are revalidated with If-None-Match / If-Modified-Since, so a
+  warm re-run mostly costs 304s.
+- When the cache grows past MAX_BYTES the least recently used bodies are evicted.
+
+Usage:
+  from http_cache import cached_get
+  resp = cached_get("https://example.com", timeout=10)
+  resp.raise_for_status(); html = resp.text
+
+Settings via environment: SEO_HTTP_CACHE_DIR, SEO_HTTP_CACHE_TTL (seconds),
+SEO_HTTP_CACHE_MAX_MB, SEO_HTTP_CACHE=0 to disable.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_DIR = os.environ.get("SEO_HTTP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "seo-scripts", "http"))
+DEFAULT_TTL = int(os.environ.get("SEO_HTTP_CACHE_TTL", 6 * 3600))
+MAX_BYTES = int(os.environ.get("SEO_HTTP_CACHE_MAX_MB", 1024)) * 1024 * 1024
+ENABLED = os.environ.get("SEO_HTTP_CACHE", "1") != "0"
+
+# Response headers worth replaying from cache
+_KEEP_HEADERS = ("content-type", "etag", "last-modified", "content-language", "cache-control")
+
+
+class HTTPCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "bodies"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS entries (
+            url TEXT PRIMARY KEY, body_hash TEXT, etag TEXT, last_modified TEXT,
+            headers TEXT, fetched_at REAL, last_access REAL)""")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS bodies (
+            body_hash TEXT PRIMARY KEY, size INTEGER, last_access REAL)""")
+        self._db.commit()
+        # Running size of the body store; the table is only summed again when this passes max_bytes
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+
+    # ---------- body store ----------
+    def _body_path(self, body_hash):
+        return os.path.join(self.cache_dir, "bodies", body_hash[:2], body_hash + ".z")
+
+    def _read_body(self, body_hash):
+        try:
+            with open(self._body_path(body_hash), "rb") as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def _write_body(self, body):
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._body_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(body, 6))
+            os.replace(tmp, path)
+        return body_hash, os.path.getsize(path)
+
+    # ---------- index ----------
+    def lookup(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body_hash, etag, last_modified, headers, fetched_at FROM entries WHERE url=?",
+                (url,)).fetchone()
+        if not row:
+            return None
+        body = self._read_body(row[0])
+        if body is None:
+            return None
+        return {"body_hash": row[0], "etag": row[1], "last_modified": row[2],
+                "headers": json.loads(row[3] or "{}"), "fetched_at": row[4], "body": body}
+
+    def store(self, url, resp):
+        body_hash, size = self._write_body(resp.content)
+        headers = {k: v for k, v in resp.headers.items() if k.lower() in _KEEP_HEADERS}
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?)",
+                             (url, body_hash, resp.headers.get("ETag"), resp.headers.get("Last-Modified"),
+                              json.dumps(headers), now, now))
+            known = self._db.execute("SELECT 1 FROM bodies WHERE body_hash=?", (body_hash,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO bodies VALUES (?,?,?)", (body_hash, size, now))
+            self._db.commit()
+            if not known:
+                self._total += size
+            over = self._total > self.max_bytes
+        if over:
+            self._evict()
+
+    def touch(self, url, body_hash, revalidated=False):
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._db.execute("UPDATE entries SET fetched_at=?, last_access=? WHERE url=?", (now, now, url))
+            else:
+                self._db.execute("UPDATE entries SET last_access=? WHERE url=?", (now, url))
+            self._db.execute("UPDATE bodies SET last_access=? WHERE body_hash=?", (now, body_hash))
+            self._db.commit()
+
+    def _evict(self):
+        with self._lock:
+            # Exact total (other processes may share the cache directory)
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+            if total <= self.max_bytes:
+                self._total = total
+                return
+            victims = []
+            for body_hash, size in self._db.execute("SELECT body_hash, size FROM bodies ORDER BY last_access"):
+                if total <= self.max_bytes * 0.9:   # evict a little extra to avoid thrashing
+                    break
+                victims.append(body_hash)
+                total -= size
+            for body_hash in victims:
+                self._db.execute("DELETE FROM bodies WHERE body_hash=?", (body_hash,))
+                self._db.execute("DELETE FROM entries WHERE body_hash=?", (body_hash,))
+                try:
+                    os.remove(self._body_path(body_hash))
+                except OSError:
+                    pass
+            self._db.commit()
+            self._total = total
+
+    # ---------- fetch ----------
+    def get(self, url, session=None, headers=None, timeout=None, ttl=None, **kwargs):
+        """requests.get with cache + conditional revalidation. Returns a requests.Response."""
+        ttl = self.ttl if ttl is None else ttl
+        getter = session.get if session is not None else requests.get
+        entry = self.lookup(url)
+
+        if entry and time.time() - entry["fetched_at"] < ttl:
+            self.touch(url, entry["body_hash"])
+            return _cached_response(url, entry)
+
+        req_headers = dict(headers or {})
+        if entry:
+            if entry["etag"]:
+                req_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                req_headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = getter(url, headers=req_headers, timeout=timeout, **kwargs)
+        if resp.status_code == 304 and entry:
+            self.touch(url, entry["body_hash"], revalidated=True)
+            return _cached_response(url, entry)
+        if resp.status_code == 200 and "no-store" not in resp.headers.get("Cache-Control", ""):
+            self.store(url, resp)
+        return resp
+
+
+def _cached_response(url, entry):
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.reason = "OK"
+    resp.url = url
+    resp._content = entry["body"]
+    resp.headers = CaseInsensitiveDict(entry["headers"])
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    resp.from_cache = True
+    return resp
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache instance (created on first use)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HTTPCache()
+        return _default_cache
+
+
+def cached_get(url, session=None, headers=None, timeout=None, **kwargs):
+    """Drop-in for requests.get(url, ...) backed by the shared disk cache."""
+    if not ENABLED:
+        getter = session.get if session is not None else requests.get
+        return getter(url, headers=headers, timeout=timeout, **kwargs)
+    return get_cache().get(url, session=session, headers=headers, timeout=timeout, **kwargs)
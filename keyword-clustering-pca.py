@@ -2,14 +2,195 @@
 # Keyword Research Prototype
 # - Input : keywords.csv (column: keyword)
 # - Output: clusters.csv + topical_map.html
+# - State : cluster_state/ (embeddings, PCA, HDBSCAN) for incremental runs
 # ===============================
 
+import json
+import os
+from xml.sax.saxutils import escape
+
 import pandas as pd
 from sentence_transformers import SentenceTransformer
 import numpy as np
 from sklearn.decomposition import PCA
+from sklearn.neighbors import NearestNeighbors
 import hdbscan
-from pyvis.network import Network
+import joblib
+
+# -------------------------------
+# 0. Settings
+# -------------------------------
+INCREMENTAL = True          # reuse saved embeddings/models; embed only new keywords
+STATE_DIR = "cluster_state"
+DRIFT_THRESHOLD = 0.20      # re-cluster when >20% of keywords added since last fit fell into noise
+MAX_GROWTH = 0.50           # ...or when the keyword set grew by >50% since last fit
+MIN_NEW_FOR_DRIFT = 500     # don't judge drift on a handful of keywords
+GRAPH_MODE = "centroid"     # "centroid" (keyword -> cluster hub) or "knn" (k nearest in-cluster)
+KNN_K = 3
+GRAPH_FORMATS = ("html", "json", "graphml")   # drop "html" for very large maps
+
+
+def state_path(name):
+    return os.path.join(STATE_DIR, name)
+
+
+def load_state():
+    try:
+        with open(state_path("meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(state_path("keywords.json"), encoding="utf-8") as f:
+            known = json.load(f)
+        return {
+            "meta": meta,
+            "keywords": known,
+            "embs": np.load(state_path("embeddings.npy")),
+            "labels": np.load(state_path("labels.npy")),
+            "pca": joblib.load(state_path("pca.joblib")),
+            "clusterer": joblib.load(state_path("clusterer.joblib")),
+        }
+    except (OSError, ValueError, KeyError, EOFError):
+        return None
+
+
+def save_state(known, embs, labels, meta, pca=None, clusterer=None):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    with open(state_path("keywords.json"), "w", encoding="utf-8") as f:
+        json.dump(known, f, ensure_ascii=False)
+    np.save(state_path("embeddings.npy"), embs)
+    np.save(state_path("labels.npy"), labels)
+    if pca is not None:
+        joblib.dump(pca, state_path("pca.joblib"))
+    if clusterer is not None:
+        joblib.dump(clusterer, state_path("clusterer.joblib"))
+    with open(state_path("meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def full_fit(embs):
+    # Optional: reduce dimensions for clustering
+    pca = PCA(n_components=min(50, embs.shape[0], embs.shape[1]))
+    embs_red = pca.fit_transform(embs)
+    clusterer = hdbscan.HDBSCAN(min_cluster_size=3, metric="euclidean", prediction_data=True)
+    labels = clusterer.fit_predict(embs_red)
+    meta = {"n_at_fit": int(embs.shape[0]), "added_since_fit": 0, "noise_since_fit": 0}
+    return pca, clusterer, labels, meta
+
+
+COLORS = [
+    "#FF5733", "#33FF57", "#3357FF", "#F3FF33", "#FF33A8",
+    "#33FFF5", "#9D33FF", "#FF8F33", "#33FF8F", "#8F33FF"
+]
+
+
+def cluster_color(cluster_id):
+    return COLORS[cluster_id % len(COLORS)] if cluster_id != -1 else "#999999"
+
+
+def cluster_groups(labels):
+    """Yield (cluster, member indices) for every non-noise cluster, from one stable sort."""
+    labels = np.asarray(labels)
+    order = np.argsort(labels, kind="stable")
+    clusters, starts = np.unique(labels[order], return_index=True)
+    for c, members in zip(clusters, np.split(order, starts[1:])):
+        if c != -1:
+            yield int(c), members
+
+
+def cluster_hubs(keywords, labels, X):
+    """One hub per cluster, labelled with the keyword closest to the centroid."""
+    hubs = {}
+    for c, members in cluster_groups(labels):
+        centroid = X[members].mean(axis=0)
+        hubs[c] = keywords[members[np.argmax(X[members] @ centroid)]]
+    return hubs
+
+
+def build_edges(keywords, labels, X, mode="centroid", k=3):
+    """Return (sources, targets) lists; noise keywords (-1) get no edges."""
+    sources, targets = [], []
+    kw = np.asarray(keywords, dtype=object)
+    for c, members in cluster_groups(labels):
+        if mode == "centroid":
+            sources.extend(kw[members].tolist())
+            targets.extend([f"cluster:{c}"] * len(members))
+            continue
+        if len(members) < 2:
+            continue
+        nn = NearestNeighbors(n_neighbors=min(k + 1, len(members))).fit(X[members])
+        _, idx = nn.kneighbors(X[members])
+        src = np.repeat(members, idx.shape[1] - 1)
+        dst = members[idx[:, 1:].ravel()]
+        # keep each undirected edge once
+        a, b = np.minimum(src, dst), np.maximum(src, dst)
+        pairs = np.unique(np.stack([a, b], axis=1), axis=0)
+        sources.extend(kw[pairs[:, 0]].tolist())
+        targets.extend(kw[pairs[:, 1]].tolist())
+    return sources, targets
+
+
+def write_graph_json(path, keywords, labels, hubs, edges):
+    nodes = [{"id": k, "cluster": int(c)} for k, c in zip(keywords, labels)]
+    nodes += [{"id": f"cluster:{c}", "cluster": c, "label": lbl, "hub": True} for c, lbl in hubs.items()]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"nodes": nodes, "edges": [[s, t] for s, t in zip(*edges)]}, f,
+                  ensure_ascii=False, separators=(",", ":"))
+
+
+def write_graphml(path, keywords, labels, hubs, edges):
+    """Stream GraphML out line by line (no networkx graph held in memory)."""
+    ids = {}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                '<key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+                '<key id="cluster" for="node" attr.name="cluster" attr.type="int"/>\n'
+                '<graph edgedefault="undirected">\n')
+        nodes = [(k, k, int(c)) for k, c in zip(keywords, labels)]
+        nodes += [(f"cluster:{c}", lbl, c) for c, lbl in hubs.items()]
+        for i, (node, label, c) in enumerate(nodes):
+            ids[node] = f"n{i}"
+            f.write(f'<node id="n{i}"><data key="label">{escape(label)}</data>'
+                    f'<data key="cluster">{c}</data></node>\n')
+        for s, t in zip(*edges):
+            f.write(f'<edge source="{ids[s]}" target="{ids[t]}"/>\n')
+        f.write("</graph>\n</graphml>\n")
+
+
+VIS_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="https://unpkg.com/vis-network@9.1.9/standalone/umd/vis-network.min.js"></script>
+<style>html, body {{ margin: 0; background: #222222; }} #map {{ width: 100%; height: 800px; }}</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var nodes = new vis.DataSet({nodes});
+var edges = new vis.DataSet({edges});
+new vis.Network(document.getElementById("map"), {{nodes: nodes, edges: edges}},
+                {{nodes: {{shape: "dot", font: {{color: "white"}}}}, edges: {{color: "#555555"}},
+                  physics: {{stabilization: {{iterations: 200}}}}}});
+</script>
+</body>
+</html>
+"""
+
+
+def _js_json(data):
+    # "</" would end the inline <script> block early
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def write_vis_html(path, keywords, labels, hubs, edges):
+    """Standalone vis-network page; the node/edge arrays are embedded as JSON in one write."""
+    nodes = [{"id": k, "label": k, "color": cluster_color(int(c))} for k, c in zip(keywords, labels)]
+    nodes += [{"id": f"cluster:{c}", "label": lbl, "color": cluster_color(c), "size": 25}
+              for c, lbl in hubs.items()]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(VIS_HTML.format(nodes=_js_json(nodes),
+                                edges=_js_json([{"from": s, "to": t} for s, t in zip(*edges)])))
+
 
 # -------------------------------
 # 1. Load Keywords
@@ -19,21 +200,51 @@ keywords = df["keyword"].dropna().unique().tolist()
 
 print(f"Loaded {len(keywords)} keywords")
 
+state = load_state() if INCREMENTAL else None
+
 # -------------------------------
-# 2. Embeddings
+# 2. Embeddings + 3. Clustering
 # -------------------------------
-model = SentenceTransformer("all-MiniLM-L6-v2")
-embs = model.encode(keywords, show_progress_bar=True)
+if state is None:
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    embs = model.encode(keywords, show_progress_bar=True).astype(np.float32)
+    pca, clusterer, all_labels, meta = full_fit(embs)
+    known = list(keywords)
+    save_state(known, embs, all_labels, meta, pca, clusterer)
+    print("Full clustering run")
+else:
+    known = state["keywords"]
+    embs = state["embs"]
+    all_labels = state["labels"]
+    meta = state["meta"]
+    known_set = set(known)
+    new_keywords = [k for k in keywords if k not in known_set]
+    print(f"Incremental run: {len(new_keywords)} new keywords")
 
-# Optional: reduce dimensions for clustering
-pca = PCA(n_components=50)
-embs_red = pca.fit_transform(embs)
+    if new_keywords:
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+        new_embs = model.encode(new_keywords, show_progress_bar=True).astype(np.float32)
+        new_labels, _strengths = hdbscan.approximate_predict(state["clusterer"], state["pca"].transform(new_embs))
 
-# -------------------------------
-# 3. Clustering
-# -------------------------------
-clusterer = hdbscan.HDBSCAN(min_cluster_size=3, metric="euclidean")
-labels = clusterer.fit_predict(embs_red)
+        known = known + new_keywords
+        embs = np.vstack([embs, new_embs])
+        all_labels = np.concatenate([all_labels, new_labels])
+        meta["added_since_fit"] += len(new_keywords)
+        meta["noise_since_fit"] += int((new_labels == -1).sum())
+
+        drift = meta["noise_since_fit"] / max(1, meta["added_since_fit"])
+        growth = meta["added_since_fit"] / max(1, meta["n_at_fit"])
+        print(f"Drift: {drift:.1%} noise among new keywords, growth {growth:.1%} since last fit")
+        if (meta["added_since_fit"] >= MIN_NEW_FOR_DRIFT and drift > DRIFT_THRESHOLD) or growth > MAX_GROWTH:
+            print("Drift threshold passed → full re-cluster")
+            pca, clusterer, all_labels, meta = full_fit(embs)
+            save_state(known, embs, all_labels, meta, pca, clusterer)
+        else:
+            save_state(known, embs, all_labels, meta)
+
+# Only report keywords present in this run's input
+label_of = dict(zip(known, all_labels.tolist()))
+labels = np.array([label_of[k] for k in keywords], dtype=int)
 
 df_result = pd.DataFrame({"keyword": keywords, "cluster": labels})
 df_result.to_csv("clusters.csv", index=False)
@@ -42,28 +253,23 @@ print("✅ Clustering complete → saved to clusters.csv")
 # -------------------------------
 # 4. Build Topical Map
 # -------------------------------
-net = Network(height="800px", width="100%", bgcolor="#222222", font_color="white")
+# Edges grow linearly with keywords: each keyword links to its cluster hub
+# ("centroid") or to its k nearest neighbours inside the cluster ("knn").
+keyword_pos = dict(zip(known, range(len(known))))
+X = embs[[keyword_pos[k] for k in keywords]]
+X = X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
 
-# assign colors per cluster
-clusters = df_result["cluster"].unique()
-colors = [
-    "#FF5733", "#33FF57", "#3357FF", "#F3FF33", "#FF33A8",
-    "#33FFF5", "#9D33FF", "#FF8F33", "#33FF8F", "#8F33FF"
-]
+edges = build_edges(keywords, labels, X, mode=GRAPH_MODE, k=KNN_K)
+hubs = cluster_hubs(keywords, labels, X) if GRAPH_MODE == "centroid" else {}
+print(f"Graph: {len(keywords) + len(hubs)} nodes, {len(edges[0])} edges")
+
+if "json" in GRAPH_FORMATS:
+    write_graph_json("topical_map.json", keywords, labels, hubs, edges)
+    print("✅ Graph JSON saved → topical_map.json")
+if "graphml" in GRAPH_FORMATS:
+    write_graphml("topical_map.graphml", keywords, labels, hubs, edges)
+    print("✅ GraphML saved → topical_map.graphml")
 
-# add nodes
-for idx, row in df_result.iterrows():
-    cluster_id = row["cluster"]
-    color = colors[cluster_id % len(colors)] if cluster_id != -1 else "#999999"
-    net.add_node(row["keyword"], label=row["keyword"], color=color)
-
-# add edges (connect keywords in same cluster)
-for cluster_id in clusters:
-    cluster_keywords = df_result[df_result["cluster"] == cluster_id]["keyword"].tolist()
-    for i in range(len(cluster_keywords)):
-        for j in range(i + 1, len(cluster_keywords)):
-            net.add_edge(cluster_keywords[i], cluster_keywords[j], color="#555555")
-
-# save HTML
-net.show("topical_map.html")
-print("✅ Topical map saved → topical_map.html")
+if "html" in GRAPH_FORMATS:
+    write_vis_html("topical_map.html", keywords, labels, hubs, edges)
+    print("✅ Topical map saved → topical_map.html")
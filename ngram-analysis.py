@@ -15,13 +15,18 @@ import time
 import json
 import os
 import re
+import threading
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from sklearn.feature_extraction.text import TfidfVectorizer
 import pandas as pd
 import tldextract
+from page_extract import parse_page
+from http_cache import cached_get
 
 # ---------- CONFIG ----------
 HEADERS = {
@@ -31,17 +36,47 @@ HEADERS = {
 }
 REQUEST_TIMEOUT = 15
 RETRY_COUNT = 2
-SLEEP_BETWEEN = 1.0
+SLEEP_BETWEEN = 1.0   # politeness delay, applied per domain
+CONCURRENCY = 8
 # ----------------------------
 
 # Basic stopword set (extend if needed)
 STOPWORDS = set("a an the of in on for to with by from is are as that this it be or at which and or".split())
 
-def safe_get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT, retries=RETRY_COUNT):
+def make_session(pool_size=CONCURRENCY) -> requests.Session:
+    """Shared keep-alive session sized for the fetch pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+class DomainThrottle:
+    """Enforce a minimum delay between requests to the same domain."""
+    def __init__(self, delay=SLEEP_BETWEEN):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._domain_locks = {}
+        self._last = {}
+
+    def wait(self, url):
+        domain = tldextract.extract(url).registered_domain or url
+        with self._lock:
+            dlock = self._domain_locks.setdefault(domain, threading.Lock())
+        with dlock:
+            last = self._last.get(domain)
+            if last is not None:
+                remaining = self.delay - (time.monotonic() - last)
+                if remaining > 0:
+                    time.sleep(remaining)
+            self._last[domain] = time.monotonic()
+
+def safe_get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT, retries=RETRY_COUNT, session=None):
     """Fetch URL with retries and basic error handling."""
     for attempt in range(retries+1):
         try:
-            resp = requests.get(url, headers=headers, timeout=timeout)
+            resp = cached_get(url, session=session, headers=headers, timeout=timeout)
             if resp.status_code == 200:
                 return resp.text
             else:
@@ -54,25 +89,11 @@ def safe_get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT, retries=RETRY_COUNT)
 
 def clean_text_from_html(html: str) -> str:
     """Extract visible text and collapse whitespace."""
-    if not html:
-        return ""
-    soup = BeautifulSoup(html, "lxml")
-    for s in soup(["script", "style", "noscript", "svg", "iframe"]):
-        s.decompose()
-    text = soup.get_text(separator=" ")
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    return parse_page(html).text
 
 def extract_headings(html: str, levels=("h1","h2","h3","h4","h5","h6")) -> List[Tuple[str,str]]:
     """Return list of (tag, text) in document order."""
-    soup = BeautifulSoup(html, "lxml")
-    headings = []
-    for el in soup.find_all(re.compile("^h[1-6]$")):
-        if el.name in levels:
-            txt = el.get_text(separator=" ").strip()
-            if txt:
-                headings.append((el.name, txt))
-    return headings
+    return [(tag, txt) for tag, txt in parse_page(html).headings if tag in levels]
 
 def tokenize(text: str):
     tokens = re.findall(r"[a-zA-Z0-9']{2,}", text.lower())
@@ -123,22 +144,40 @@ def bing_search_scrape(keyword: str, topn: int = 3) -> List[str]:
     return urls
 
 # ---------- Main pipeline ----------
-def analyze_pages(urls: List[str], outdir: str, ngram_range=(1,3), topk=30):
+def fetch_pages(urls: List[str], concurrency=CONCURRENCY):
+    """Yield (index, html) as pages finish downloading, throttled per domain."""
+    session = make_session(concurrency)
+    throttle = DomainThrottle()
+
+    def fetch(url):
+        throttle.wait(url)
+        return safe_get(url, session=session)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(fetch, url): i for i, url in enumerate(urls)}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            i = futures[fut]
+            print(f"[fetch] ({done}/{len(urls)}) {urls[i]}")
+            yield i, fut.result()
+    session.close()
+
+def analyze_pages(urls: List[str], outdir: str, ngram_range=(1,3), topk=30, concurrency=CONCURRENCY):
     os.makedirs(outdir, exist_ok=True)
-    page_texts = []
-    meta = []
-    headings_collection = []
+    page_texts = [""] * len(urls)
+    meta = [None] * len(urls)
+    headings_collection = [[] for _ in urls]
 
-    for idx, url in enumerate(urls, start=1):
-        print(f"[fetch] ({idx}/{len(urls)}) {url}")
-        html = safe_get(url)
-        time.sleep(SLEEP_BETWEEN)
-        text = clean_text_from_html(html)
-        page_texts.append(text)
-        headings = extract_headings(html)
-        headings_collection.append(headings)
+    # Parse each page as soon as it arrives; slots keep the original URL order
+    for i, html in fetch_pages(urls, concurrency=concurrency):
+        idx = i + 1
+        url = urls[i]
+        page = parse_page(html)   # one parse gives both text and headings
+        text = page.text
+        page_texts[i] = text
+        headings = page.headings
+        headings_collection[i] = headings
         domain = tldextract.extract(url).fqdn
-        meta.append({"url": url, "domain": domain, "text_len": len(text), "headings_count": len(headings)})
+        meta[i] = {"url": url, "domain": domain, "text_len": len(text), "headings_count": len(headings)}
         # Save raw HTML & headings
         with open(os.path.join(outdir, f"page_{idx}.html"), "w", encoding="utf-8") as f:
             f.write(html)
@@ -235,6 +274,7 @@ def main():
     p.add_argument("--outdir", default="results", help="Output directory")
     p.add_argument("--ngram_min", type=int, default=1)
     p.add_argument("--ngram_max", type=int, default=3)
+    p.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Parallel page fetches")
     args = p.parse_args()
 
     urls = []
@@ -265,7 +305,8 @@ def main():
         return
 
     print(f"[info] Found {len(urls)} URLs. Starting analysis...")
-    analyze_pages(urls, args.outdir, ngram_range=(args.ngram_min, args.ngram_max))
+    analyze_pages(urls, args.outdir, ngram_range=(args.ngram_min, args.ngram_max),
+                  concurrency=max(1, args.concurrency))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,136 @@
+"""
+page_extract.py
+Parse an HTML page once and pull out everything the audit scripts need:
+visible text, headings, title, meta description, canonical, images, links and
+external scripts/stylesheets.
+
+Uses lxml (libxml2) instead of BeautifulSoup's pure-Python html.parser,
+and walks the tree a single time.
+
+Usage:
+  from page_extract import parse_page
+  page = parse_page(html, base_url="https://example.com/")
+  print(page.title, page.canonical, len(page.images))
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+# Elements whose text is never visible on the page
+HIDDEN_TAGS = ("script", "style", "noscript", "svg", "iframe", "template")
+_WS = re.compile(r"\s+")
+
+
+@dataclass
+class PageDoc:
+    text: str = ""
+    title: Optional[str] = None
+    meta_description: Optional[str] = None
+    canonical: Optional[str] = None                                 # absolute when base_url is given
+    headings: List[Tuple[str, str]] = field(default_factory=list)   # (tag, text) in document order
+    images: List[dict] = field(default_factory=list)                # {"src", "alt", "srcset", "loading", "width", "height"}
+    links: List[str] = field(default_factory=list)                  # absolute when base_url is given
+    scripts: List[str] = field(default_factory=list)                # <script src>
+    stylesheets: List[str] = field(default_factory=list)            # <link rel=stylesheet href>
+
+
+def _clean(s):
+    return _WS.sub(" ", s).strip() if s else ""
+
+
+def _text_of(el):
+    return _clean(" ".join(el.itertext()))
+
+
+def _in_hidden(el):
+    return any(isinstance(a.tag, str) and a.tag.lower() in HIDDEN_TAGS for a in el.iterancestors())
+
+
+def _join(base_url, url):
+    """url resolved against base_url; None when it is malformed (e.g. "http://[oops/x")."""
+    url = url.strip()
+    if not base_url:
+        return url
+    try:
+        return urljoin(base_url, url)
+    except ValueError:
+        return None
+
+
+def parse_page(html, base_url: Optional[str] = None) -> PageDoc:
+    """Parse HTML (str or bytes) once and return a PageDoc."""
+    doc = PageDoc()
+    if not html:
+        return doc
+    try:
+        root = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        # lxml refuses str input carrying an XML encoding declaration
+        if isinstance(html, str):
+            return parse_page(html.encode("utf-8"), base_url)
+        return doc
+
+    hidden = []
+    for el in root.iter(etree.Element, etree.Comment):
+        tag = el.tag if isinstance(el.tag, str) else None
+        if tag is None:
+            hidden.append(el)
+            continue
+        tag = tag.lower()
+        if tag in HIDDEN_TAGS:
+            hidden.append(el)
+            src = _join(base_url, el.get("src") or "") if tag == "script" else None
+            if src:
+                doc.scripts.append(src)
+        elif tag in HEADING_TAGS:
+            if _in_hidden(el):      # e.g. <noscript><h2>: not visible, and not in doc.text either
+                continue
+            txt = _text_of(el)
+            if txt:
+                doc.headings.append((tag, txt))
+        elif tag == "title" and doc.title is None:
+            doc.title = _clean(el.text_content()) or None
+        elif tag == "meta":
+            if (el.get("name") or "").lower() == "description" and doc.meta_description is None:
+                doc.meta_description = (el.get("content") or "").strip()
+        elif tag == "link":
+            rel = (el.get("rel") or "").lower().split()
+            href = (el.get("href") or "").strip()
+            if "canonical" in rel and doc.canonical is None and href:
+                doc.canonical = _join(base_url, href)
+            elif "stylesheet" in rel and href:
+                href = _join(base_url, href)
+                if href:
+                    doc.stylesheets.append(href)
+        elif tag == "img":
+            src = el.get("src") or ""
+            if not src or src.startswith("data:"):
+                # lazy-loading: src holds a data: placeholder, the real image is in data-src
+                src = el.get("data-src") or src
+            src = _join(base_url, src) if src else None
+            if src:
+                doc.images.append({
+                    "src": src,
+                    "alt": el.get("alt", ""),
+                    "srcset": el.get("srcset"),
+                    "loading": el.get("loading"),
+                    "width": el.get("width"),
+                    "height": el.get("height"),
+                })
+        elif tag == "a":
+            href = el.get("href")
+            if href and not href.startswith(("#", "javascript:", "mailto:", "tel:")):
+                href = _join(base_url, href)
+                if href:
+                    doc.links.append(href)
+
+    for el in hidden:
+        if el.getparent() is not None:
+            el.drop_tree()
+    doc.text = _text_of(root)
+    return doc
@@ -1,14 +1,25 @@
-import pandas as pd
+import os
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
 
 # Load the CSV files
 sb404_path = r"C:\Users\status404.csv"
 sb200_path = r"C:\Users\status-200.csv"
+output_path = r"C:\Users\xxx.csv"
+
+# Matcher settings
+NGRAM = 3              # character n-gram size for the inverted index
+CANDIDATES = 50        # candidates kept per 404 URL after index scoring
+RESCORE_TOP_K = 10     # re-rank this many with SequenceMatcher (0 = index score only)
+MAX_DF = 0.05          # ignore n-grams found in more than 5% of 200 URLs ("https", ".com/", ...)
+WORKERS = os.cpu_count() or 1
 
-sb404_df = pd.read_csv(sb404_path)
-sb200_df = pd.read_csv(sb200_path)
 
-# Function to find the best match based on similarity
+# Function to find the best match based on similarity (exact, O(M) per URL)
 def find_best_match(target_url, possible_matches):
     best_match = None
     highest_similarity = 0.0
@@ -19,20 +30,104 @@ def find_best_match(target_url, possible_matches):
             best_match = url
     return best_match
 
-# Dictionary to store the redirect mapping
-redirect_mapping = {'404_URL': [], '200_URL': []}
 
-# Find the best match for each 404 URL
-for sb404_url in sb404_df['URL']:
-    best_match = find_best_match(sb404_url, sb200_df['URL'])
-    redirect_mapping['404_URL'].append(sb404_url)
-    redirect_mapping['200_URL'].append(best_match)
+def url_ngrams(url, n=NGRAM):
+    """Character n-grams of the lowercased path/query (host is usually shared, so skip it)."""
+    parts = urlsplit(url)
+    key = (parts.path + ("?" + parts.query if parts.query else "")).lower() or url.lower()
+    key = f"^{key}$"
+    return {key[i:i + n] for i in range(max(1, len(key) - n + 1))}
 
-# Convert the mapping to a DataFrame
-redirect_df = pd.DataFrame(redirect_mapping)
 
-# Save the redirect mapping to a new CSV file
-output_path = r"C:\Users\xxx.csv"
-redirect_df.to_csv(output_path, index=False)
+class NgramIndex:
+    """Inverted index: n-gram -> ids of 200 URLs containing it."""
+
+    def __init__(self, urls):
+        self.urls = list(urls)
+        postings = {}
+        self.sizes = np.empty(len(self.urls), dtype=np.int32)
+        for i, url in enumerate(self.urls):
+            grams = url_ngrams(url)
+            self.sizes[i] = len(grams)
+            for g in grams:
+                postings.setdefault(g, []).append(i)
+        max_df = max(50, int(MAX_DF * len(self.urls)))
+        self.postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in postings.items()}
+        self.stop_grams = {g for g, ids in self.postings.items() if len(ids) > max_df}
+
+    def candidates(self, url, limit=CANDIDATES):
+        """Return candidate ids ranked by n-gram Dice overlap."""
+        grams = url_ngrams(url)
+        lists = [self.postings[g] for g in grams if g in self.postings and g not in self.stop_grams]
+        if not lists:
+            # Only very common grams shared: fall back to the rarest few of them
+            common = sorted((g for g in grams if g in self.postings), key=lambda g: len(self.postings[g]))
+            lists = [self.postings[g] for g in common[:3]]
+        if not lists:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        ids, shared = np.unique(np.concatenate(lists), return_counts=True)
+        scores = 2.0 * shared / (len(grams) + self.sizes[ids])
+        if len(ids) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return ids[order], scores[order]
+
+    def best_match(self, url, rescore_top_k=RESCORE_TOP_K):
+        """Approximate find_best_match: only the top index candidates are rescored, so the
+        pick can be worse than brute force, and a URL sharing no n-grams gets (None, 0.0)."""
+        ids, scores = self.candidates(url)
+        if len(ids) == 0:
+            return None, 0.0
+        if rescore_top_k:
+            best, best_score = None, 0.0
+            for i in ids[:rescore_top_k]:
+                cand = self.urls[i]
+                ratio = SequenceMatcher(None, url, cand).ratio()
+                if ratio > best_score:
+                    best, best_score = cand, ratio
+            return best, best_score
+        return self.urls[ids[0]], float(scores[0])
+
+
+# Each worker process builds/receives the index once, not once per URL
+_index = None
+
+
+def _init_worker(urls_200):
+    global _index
+    _index = NgramIndex(urls_200)
+
+
+def _match_one(url):
+    return _index.best_match(url)
+
+
+def build_redirect_mapping(urls_404, urls_200, workers=WORKERS):
+    urls_404 = list(urls_404)
+    urls_200 = list(dict.fromkeys(urls_200))
+    if workers <= 1:
+        _init_worker(urls_200)
+        results = [_match_one(u) for u in urls_404]
+    else:
+        chunksize = max(1, len(urls_404) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(urls_200,)) as pool:
+            results = list(pool.map(_match_one, urls_404, chunksize=chunksize))
+    return pd.DataFrame({
+        '404_URL': urls_404,
+        '200_URL': [m for m, _ in results],
+        'Similarity': [round(s, 4) for _, s in results],
+    })
+
+
+if __name__ == "__main__":
+    sb404_df = pd.read_csv(sb404_path)
+    sb200_df = pd.read_csv(sb200_path)
+
+    # Find the best match for each 404 URL
+    redirect_df = build_redirect_mapping(sb404_df['URL'].astype(str), sb200_df['URL'].astype(str))
+
+    # Save the redirect mapping to a new CSV file
+    redirect_df.to_csv(output_path, index=False)
 
-print("Redirect mapping has been saved to:", output_path)
+    print("Redirect mapping has been saved to:", output_path)
@@ -1,43 +1,117 @@
- === 1️⃣ Imports ===
-import pandas as pd
-from sentence_transformers import SentenceTransformer, util
+# === 1️⃣ Imports ===
+import json
+import os
 
-# === 2️⃣ Load model ===
-model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+import numpy as np
+import pandas as pd
+from sentence_transformers import SentenceTransformer
 
-# === 3️⃣ Load data ===
+# === 2️⃣ Setting ===
+MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
 csv_path = r"C:\Users\syede\OneDrive\Documents\Woos 301.csv"
-df = pd.read_csv(csv_path)
-
-# Pastikan ada kolum "URL" atau ubah nama ikut fail sebenar
-urls_404 = df['URL'].astype(str).tolist()
-
-# === 4️⃣ URL cadangan (pilihan destinasi) ===
-candidate_urls = [
-    "https://yours.co/products",
-    "https://yours.co/pages/about-us",
-]
-
-# === 5️⃣ Encode semua URL ===
-cand_embeddings = model.encode(candidate_urls, convert_to_tensor=True)
-
-# === 6️⃣ Cari padanan terbaik bagi setiap URL 404 ===
-best_matches = []
-for url in urls_404:
-    query_embedding = model.encode(url, convert_to_tensor=True)
-    cosine_scores = util.cos_sim(query_embedding, cand_embeddings)
-    best_idx = cosine_scores.argmax().item()
-    best_url = candidate_urls[best_idx]
-    best_score = cosine_scores[0][best_idx].item()
-    best_matches.append({
-        "404_URL": url,
-        "Best_Match_URL": best_url,
-        "Similarity_Score": round(best_score, 4)
-    })
-
-# === 7️⃣ Simpan hasil ke CSV ===
-output_df = pd.DataFrame(best_matches)
 output_path = r"C:\file-path.csv"
-output_df.to_csv(output_path, index=False)
+CACHE_DIR = os.path.join(os.path.dirname(output_path), "embedding_cache")  # .npy + key list
+BATCH_SIZE = 256
+TOP_K = 3            # berapa padanan terbaik disimpan untuk setiap URL 404
+BLOCK_ROWS = 4096    # baris query per matmul, supaya memory terkawal
+
+
+class EmbeddingCache:
+    """Cache embedding ikut teks URL, disimpan sebagai .npy (dibaca guna mmap)."""
+
+    def __init__(self, cache_dir, model_name):
+        safe = model_name.replace("/", "__")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.npy_path = os.path.join(cache_dir, f"{safe}.npy")
+        self.keys_path = os.path.join(cache_dir, f"{safe}.keys.json")
+        self.keys = []
+        self.matrix = None
+        if os.path.exists(self.npy_path) and os.path.exists(self.keys_path):
+            with open(self.keys_path, encoding="utf-8") as f:
+                self.keys = json.load(f)
+            self.matrix = np.load(self.npy_path, mmap_mode="r")
+        self.index = {k: i for i, k in enumerate(self.keys)}
+
+    def encode(self, model, texts):
+        """Pulangkan embedding (ternormal) untuk texts; hanya teks baru yang di-encode."""
+        unique = list(dict.fromkeys(texts))
+        new = [t for t in unique if t not in self.index]
+        if new:
+            print(f"Encode {len(new)} URL baru ({len(unique) - len(new)} dari cache)")
+            fresh = model.encode(new, batch_size=BATCH_SIZE, convert_to_numpy=True,
+                                 normalize_embeddings=True, show_progress_bar=True).astype(np.float32)
+            self._append(new, fresh)
+        return np.asarray(self.matrix[[self.index[t] for t in texts]])
+
+    def _append(self, keys, vectors):
+        n_old = len(self.keys)
+        dim = vectors.shape[1]
+        tmp_path = self.npy_path + ".tmp.npy"
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(n_old + len(keys), dim))
+        if n_old:
+            out[:n_old] = self.matrix
+        out[n_old:] = vectors
+        out.flush()
+        del out
+        self.matrix = None
+        os.replace(tmp_path, self.npy_path)
+        self.keys.extend(keys)
+        with open(self.keys_path, "w", encoding="utf-8") as f:
+            json.dump(self.keys, f)
+        self.index = {k: i for i, k in enumerate(self.keys)}
+        self.matrix = np.load(self.npy_path, mmap_mode="r")
+
+
+def top_k_matches(query_emb, cand_emb, k=TOP_K):
+    """Top-k cosine (embedding dah normalize -> dot product) guna matmul berblok."""
+    k = min(k, cand_emb.shape[0])
+    all_idx = np.empty((query_emb.shape[0], k), dtype=np.int64)
+    all_scores = np.empty((query_emb.shape[0], k), dtype=np.float32)
+    for start in range(0, query_emb.shape[0], BLOCK_ROWS):
+        sims = query_emb[start:start + BLOCK_ROWS] @ cand_emb.T
+        idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        part = np.take_along_axis(sims, idx, axis=1)
+        order = np.argsort(-part, axis=1)
+        all_idx[start:start + BLOCK_ROWS] = np.take_along_axis(idx, order, axis=1)
+        all_scores[start:start + BLOCK_ROWS] = np.take_along_axis(part, order, axis=1)
+    return all_idx, all_scores
+
+
+if __name__ == "__main__":
+    # === 3️⃣ Load model ===
+    model = SentenceTransformer(MODEL_NAME)
+    cache = EmbeddingCache(CACHE_DIR, MODEL_NAME)
+
+    # === 4️⃣ Load data ===
+    df = pd.read_csv(csv_path)
+
+    # Pastikan ada kolum "URL" atau ubah nama ikut fail sebenar
+    urls_404 = df['URL'].astype(str).tolist()
+
+    # === 5️⃣ URL cadangan (pilihan destinasi) ===
+    candidate_urls = [
+        "https://yours.co/products",
+        "https://yours.co/pages/about-us",
+    ]
+
+    # === 6️⃣ Encode semua URL sekali gus (batch + cache) ===
+    cand_embeddings = cache.encode(model, candidate_urls)
+    query_embeddings = cache.encode(model, urls_404)
+
+    # === 7️⃣ Cari top-k padanan bagi semua URL 404 dalam satu matmul ===
+    top_idx, top_scores = top_k_matches(query_embeddings, cand_embeddings)
+
+    best_matches = []
+    for url, idx_row, score_row in zip(urls_404, top_idx, top_scores):
+        best_matches.append({
+            "404_URL": url,
+            "Best_Match_URL": candidate_urls[idx_row[0]],
+            "Similarity_Score": round(float(score_row[0]), 4),
+            "Top_Matches": "; ".join(f"{candidate_urls[i]} ({s:.4f})" for i, s in zip(idx_row, score_row)),
+        })
+
+    # === 8️⃣ Simpan hasil ke CSV ===
+    output_df = pd.DataFrame(best_matches)
+    output_df.to_csv(output_path, index=False)
 
-print(f"Hasil disimpan ke: {output_path}")
+    print(f"Hasil disimpan ke: {output_path}")
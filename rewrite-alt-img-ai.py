@@ -1,7 +1,16 @@
-mport requests
-from bs4 import BeautifulSoup
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-from transformers import pipeline
+from page_extract import parse_page
+from http_cache import cached_get
+
+# ✅ Setting
+MODEL_NAME = "facebook/bart-large-cnn"
+BATCH_SIZE = 16                 # prompt per batch untuk model (CPU)
+SCRAPE_WORKERS = 16             # page di-scrape serentak
+CACHE_PATH = "alt_rewrite_cache.sqlite3"   # cache ikut (model, alt text)
+PROMPT = "Rewrite this alt text to be SEO-friendly and descriptive: {}"
 
 # ✅ Senarai URL (boleh baca dari CSV / sitemap juga)
 urls = [
@@ -10,48 +19,61 @@ urls = [
     "https://example.com/page3"
 ]
 
-# Init dataframe
-data = []
-
-# ✅ Scrape semua URL
-for url in urls:
+def scrape(url):
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-        images = soup.find_all("img")
-
-        for img in images:
-            src = img.get("src")
-            alt = img.get("alt", "")
-            if src:
-                data.append({
-                    "page_url": url,
-                    "image_url": src,
-                    "alt_original": alt
-                })
+        response = cached_get(url, timeout=10)
+        page = parse_page(response.content)
+        return [{"page_url": url, "image_url": img["src"], "alt_original": img["alt"]} for img in page.images]
     except Exception as e:
         print(f"Error scraping {url}: {e}")
+        return []
+
+# ✅ Scrape semua URL serentak (urutan hasil ikut senarai asal)
+data = []
+with ThreadPoolExecutor(max_workers=SCRAPE_WORKERS) as pool:
+    for rows in pool.map(scrape, urls):
+        data.extend(rows)
 
-df = pd.DataFrame(data)
+df = pd.DataFrame(data, columns=["page_url", "image_url", "alt_original"])
+df["alt_original"] = df["alt_original"].fillna("")
 
-# ✅ Setup LLM pipeline
-generator = pipeline("text2text-generation", model="facebook/bart-large-cnn")
+# ✅ Dedupe alt text sebelum inference
+unique_alts = sorted({a.strip() for a in df["alt_original"] if a.strip()})
 
-def rewrite_alt(alt_text):
-    if not alt_text.strip():
-        return ""
-    try:
-        result = generator(
-            f"Rewrite this alt text to be SEO-friendly and descriptive: {alt_text}",
-            max_length=30,
-            do_sample=False
-        )
-        return result[0]['generated_text']
-    except:
-        return alt_text
-
-# ✅ Rewrite bulk alt
-df["alt_rewritten"] = df["alt_original"].apply(rewrite_alt)
+# ✅ Cache: alt yang pernah di-rewrite (untuk model yang sama) tak perlu diproses lagi
+db = sqlite3.connect(CACHE_PATH)
+db.execute("CREATE TABLE IF NOT EXISTS rewrites (model TEXT, alt TEXT, rewritten TEXT, PRIMARY KEY (model, alt))")
+rewritten = dict(db.execute("SELECT alt, rewritten FROM rewrites WHERE model=?", (MODEL_NAME,)))
+todo = [a for a in unique_alts if a not in rewritten]
+print(f"{len(df)} images, {len(unique_alts)} unique alts, {len(todo)} need the model")
+
+if todo:
+    # ✅ Setup LLM pipeline (hanya bila ada alt baru)
+    from transformers import pipeline
+    generator = pipeline("text2text-generation", model=MODEL_NAME, device=-1)
+
+    # Simpan ke cache setiap chunk, supaya run yang terhenti boleh sambung
+    chunk = BATCH_SIZE * 8
+    for start in range(0, len(todo), chunk):
+        alts = todo[start:start + chunk]
+        try:
+            results = generator([PROMPT.format(a) for a in alts], batch_size=BATCH_SIZE,
+                                max_length=30, do_sample=False)
+            outputs = [r[0]["generated_text"] if isinstance(r, list) else r["generated_text"] for r in results]
+        except Exception as e:
+            # Jangan cache kegagalan: chunk ini dicuba semula pada run seterusnya
+            print(f"Batch failed ({e}); keeping original alts for this chunk")
+            rewritten.update(zip(alts, alts))
+            continue
+        db.executemany("INSERT OR REPLACE INTO rewrites VALUES (?, ?, ?)",
+                       [(MODEL_NAME, a, o) for a, o in zip(alts, outputs)])
+        db.commit()
+        rewritten.update(zip(alts, outputs))
+        print(f"  {min(start + chunk, len(todo))}/{len(todo)} rewritten")
+db.close()
+
+# ✅ Rewrite bulk alt (map balik ke setiap baris)
+df["alt_rewritten"] = df["alt_original"].map(lambda a: rewritten.get(a.strip(), a) if a.strip() else "")
 
 # ✅ Save ke CSV
 df.to_csv("bulk_rewritten_alts.csv", index=False, encoding="utf-8")
@@ -0,0 +1,352 @@
+"""
+site_crawler.py
+Crawl a site once and stream every fetched page to the audit scripts.
+
+- Seeds from a root URL and/or a sitemap
+- Respects robots.txt (and its Crawl-delay) per host
+- Bounded async frontier (spills to disk when full) with per-host politeness
+- URL normalisation + Bloom filter for seen URLs, so memory stays flat
+- Each page is fetched and parsed (page_extract) once, then handed to every
+  registered analyzer: analyzer(url, html, page)
+
+Usage:
+  python site_crawler.py https://example.com --audits onpage,canonical,seo
+  python site_crawler.py https://example.com --sitemap https://example.com/sitemap.xml --max-pages 5000
+
+From code:
+  crawler = SiteCrawler(["https://example.com"])
+  crawler.register(lambda url, html, page: print(url, page.title))
+  asyncio.run(crawler.run())
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import os
+import tempfile
+import time
+from collections import deque
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from page_extract import parse_page
+from sitemap_reader import iter_sitemap
+
+USER_AGENT = "Mozilla/5.0 (compatible; seo-site-crawler/1.0)"
+CONCURRENCY = 32          # pages in flight across all hosts
+PER_HOST = 4              # connections per host
+HOST_DELAY = 0.5          # minimum seconds between requests to one host (robots Crawl-delay wins if larger)
+REQUEST_TIMEOUT = 20
+FRONTIER_IN_MEMORY = 50_000
+MAX_PAGES = 100_000
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid")
+
+
+# ---------- URL normalisation ----------
+def normalize_url(url, base=None):
+    """Absolute, lowercased scheme/host, no fragment, no default port, tracking params dropped."""
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return None
+    host = (parts.hostname or "").lower()
+    if not host:
+        return None
+    port = parts.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAMS)]
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(sorted(query)), ""))
+
+
+# ---------- Bloom filter ----------
+class BloomFilter:
+    """Fixed-size bit array; memory depends on capacity, not on how many URLs are seen."""
+
+    def __init__(self, capacity=10_000_000, error_rate=0.001):
+        self.size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        """Add item; return True if it was (probably) already present."""
+        present = True
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+    def __contains__(self, item):
+        return all(self.bits[p // 8] & (1 << (p % 8)) for p in self._positions(item))
+
+
+# ---------- Frontier ----------
+class Frontier:
+    """FIFO of URLs: in memory up to a limit, then spilled to a temp file."""
+
+    def __init__(self, max_in_memory=FRONTIER_IN_MEMORY):
+        self.max_in_memory = max_in_memory
+        self.queue = deque()
+        self.spill = None
+        self.spilled = 0
+        self.read_pos = 0
+
+    def push(self, url):
+        if len(self.queue) < self.max_in_memory and not self.spilled:
+            self.queue.append(url)
+            return
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        self.spill.seek(0, os.SEEK_END)
+        self.spill.write(url + "\n")
+        self.spilled += 1
+
+    def pop(self):
+        if not self.queue and self.spilled:
+            self.spill.seek(self.read_pos)
+            for _ in range(min(self.spilled, self.max_in_memory)):
+                self.queue.append(self.spill.readline().rstrip("\n"))
+                self.spilled -= 1
+            self.read_pos = self.spill.tell()
+        return self.queue.popleft() if self.queue else None
+
+    def __len__(self):
+        return len(self.queue) + self.spilled
+
+
+# ---------- Crawler ----------
+class SiteCrawler:
+    def __init__(self, start_urls, sitemaps=(), max_pages=MAX_PAGES, concurrency=CONCURRENCY,
+                 per_host=PER_HOST, host_delay=HOST_DELAY, same_host=True, user_agent=USER_AGENT):
+        self.start_urls = [u for u in (normalize_url(u) for u in start_urls) if u]
+        self.sitemaps = list(sitemaps)
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_delay = host_delay
+        self.same_host = same_host
+        self.user_agent = user_agent
+        self.allowed_hosts = {urlsplit(u).netloc for u in self.start_urls}
+        self.entry_urls = set(self.start_urls)     # start URLs and where they redirect to
+        self.analyzers = []
+        self.seen = BloomFilter(capacity=max(max_pages * 20, 100_000))
+        self.frontier = Frontier()
+        self.robots = {}
+        self.host_locks = {}
+        self.host_next = {}
+        self.fetched = 0
+        self.errors = 0
+
+    def register(self, analyzer):
+        """analyzer(url, html, page) is called once per fetched HTML page."""
+        self.analyzers.append(analyzer)
+        return analyzer
+
+    def enqueue(self, url, base=None):
+        try:
+            url = normalize_url(url, base)
+        except ValueError:          # e.g. "http://[oops/x" or a non-numeric port: drop the link
+            return
+        if not url:
+            return
+        if self.same_host and urlsplit(url).netloc not in self.allowed_hosts:
+            return
+        if not self.seen.add(url):
+            self.frontier.push(url)
+
+    async def _load_robots(self, session, origin):
+        rp = RobotFileParser()
+        try:
+            async with session.get(origin + "/robots.txt") as resp:
+                body = await resp.text(errors="replace") if resp.status == 200 else ""
+                rp.parse(body.splitlines())
+                if resp.status in (401, 403):
+                    rp.disallow_all = True
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            rp.parse([])
+        return rp
+
+    async def _robots_for(self, session, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        # One task per origin: workers hitting a new host together all await the same download
+        if origin not in self.robots:
+            self.robots[origin] = asyncio.ensure_future(self._load_robots(session, origin))
+        return await self.robots[origin]
+
+    async def _polite_wait(self, session, url):
+        host = urlsplit(url).netloc
+        lock = self.host_locks.setdefault(host, asyncio.Lock())
+        rp = await self._robots_for(session, url)
+        delay = max(self.host_delay, float(rp.crawl_delay(self.user_agent) or 0))
+        async with lock:
+            wait = self.host_next.get(host, 0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.host_next[host] = time.monotonic() + delay
+        return rp
+
+    async def _seed_sitemap(self, sitemap_url):
+        """Stream the sitemap (and any index children) in a thread, enqueueing locs on the loop."""
+        loop = asyncio.get_running_loop()
+
+        def read_all():
+            stats = {}
+            for rec in iter_sitemap(sitemap_url, stats=stats):
+                loop.call_soon_threadsafe(self.enqueue, rec.loc)
+            for url, entry in stats.items():
+                if entry["error"]:
+                    print(f"[sitemap] {url}: {entry['error']}")
+
+        await loop.run_in_executor(None, read_all)
+
+    def _process(self, url, html):
+        try:
+            page = parse_page(html, base_url=url)
+        except Exception as e:      # one bad page must not stop the crawl
+            self.errors += 1
+            print(f"[parse] {url}: {e}")
+            return []
+        for analyzer in self.analyzers:
+            try:
+                analyzer(url, html, page)
+            except Exception as e:
+                print(f"[analyzer] {getattr(analyzer, '__name__', analyzer)} failed on {url}: {e}")
+        return page.links
+
+    def _follow_entry_redirect(self, url, location):
+        """A start URL moving to another host (apex -> www, new domain) brings that host into scope."""
+        try:
+            target = normalize_url(location, url)
+        except ValueError:
+            return
+        if target:
+            self.allowed_hosts.add(urlsplit(target).netloc)
+            self.entry_urls.add(target)
+
+    async def _fetch(self, session, url):
+        rp = await self._polite_wait(session, url)
+        if not rp.can_fetch(self.user_agent, url):
+            return
+        try:
+            # Redirects are not followed here: the target goes through the frontier like any
+            # link, so a page reached from several old URLs is fetched (and audited) once.
+            async with session.get(url, allow_redirects=False) as resp:
+                if resp.status in (301, 302, 303, 307, 308):
+                    if "Location" in resp.headers:
+                        if url in self.entry_urls:
+                            self._follow_entry_redirect(url, resp.headers["Location"])
+                        self.enqueue(resp.headers["Location"], base=url)
+                    return
+                if resp.status != 200 or "html" not in resp.headers.get("Content-Type", ""):
+                    return
+                html = await resp.text(errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.errors += 1
+            print(f"[fetch] {url}: {e}")
+            return
+        self.fetched += 1
+        links = await asyncio.get_running_loop().run_in_executor(None, self._process, url, html)
+        for link in links:
+            self.enqueue(link)
+
+    async def run(self):
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={"User-Agent": self.user_agent}) as session:
+            for sitemap in self.sitemaps:
+                await self._seed_sitemap(sitemap)
+            for url in self.start_urls:
+                self.enqueue(url)
+
+            in_flight = 0
+
+            async def worker():
+                nonlocal in_flight
+                while self.fetched < self.max_pages:
+                    url = self.frontier.pop()
+                    if url is None:
+                        if in_flight == 0:
+                            return
+                        await asyncio.sleep(0.05)   # others may still discover links
+                        continue
+                    in_flight += 1
+                    try:
+                        await self._fetch(session, url)
+                    finally:
+                        in_flight -= 1
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        print(f"[crawl] fetched {self.fetched} pages, {self.errors} errors, {len(self.frontier)} left in frontier")
+
+
+# ---------- Audit wiring ----------
+def load_script(name):
+    """Import one of the repo's extensionless scripts (e.g. 'scan-onpage-elements') as a module."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    loader = SourceFileLoader(name.replace("-", "_").replace(".py", ""), path)
+    module = module_from_spec(spec_from_loader(loader.name, loader))
+    loader.exec_module(module)
+    return module
+
+
+def audit_analyzers(names):
+    """Build analyzers for the existing audit scripts, all fed from the same crawl."""
+    analyzers = []
+    if "onpage" in names:
+        onpage = load_script("scan-onpage-elements")
+        analyzers.append(lambda url, html, page: onpage.analyze_onpage_seo(html, url, page=page))
+    if "canonical" in names:
+        canonical = load_script("check-canonical-tag")
+        analyzers.append(lambda url, html, page: canonical.report_canonical(url, page.canonical))
+    if "seo" in names:
+        seo = load_script("seo-audit")
+        analyzers.append(lambda url, html, page: seo.report_on_page_factors(url, page))
+    if "mobile" in names:
+        api_key = os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            print("[mobile] set GOOGLE_API_KEY to run the mobile-friendly check")
+        else:
+            mobile = load_script("mobile-friendly-checker")
+            analyzers.append(lambda url, html, page: mobile.check_mobile_friendly(api_key, url))
+    return analyzers
+
+
+def main():
+    p = argparse.ArgumentParser(description="Crawl a site once and feed the on-page audits")
+    p.add_argument("start_urls", nargs="*", help="Root URL(s) to start from")
+    p.add_argument("--sitemap", action="append", default=[], help="Sitemap URL to seed from (repeatable)")
+    p.add_argument("--audits", default="onpage,canonical,seo", help="Comma list: onpage,canonical,seo,mobile")
+    p.add_argument("--max-pages", type=int, default=MAX_PAGES)
+    p.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    p.add_argument("--per-host", type=int, default=PER_HOST)
+    p.add_argument("--delay", type=float, default=HOST_DELAY, help="Seconds between requests to one host")
+    args = p.parse_args()
+
+    if not args.start_urls and not args.sitemap:
+        p.error("give at least one start URL or --sitemap")
+    start_urls = args.start_urls or [f"{urlsplit(s).scheme}://{urlsplit(s).netloc}/" for s in args.sitemap]
+    crawler = SiteCrawler(start_urls, sitemaps=args.sitemap, max_pages=args.max_pages,
+                          concurrency=args.concurrency, per_host=args.per_host, host_delay=args.delay)
+    for analyzer in audit_analyzers(set(args.audits.split(","))):
+        crawler.register(analyzer)
+    asyncio.run(crawler.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+sitemap_reader.py
+Streaming sitemap reader shared by the sitemap tools.
+
+- Parses with ElementTree.iterparse and clears elements as it goes, so memory
+  stays flat on 50k-URL files
+- Follows sitemap indexes, fetching child sitemaps concurrently
+- Decompresses .xml.gz on the fly (gzip magic bytes, not just the file name)
+- Yields SitemapRecord(loc, lastmod, sitemap) as a generator and fills a
+  per-sitemap stats dict (URL count, parse time, errors)
+
+Usage:
+  from sitemap_reader import iter_sitemap
+  stats = {}
+  for rec in iter_sitemap("https://example.com/sitemap_index.xml", stats=stats):
+      print(rec.loc, rec.lastmod)
+"""
+import gzip
+import io
+import queue
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+WORKERS = 8
+MAX_DEPTH = 3              # index -> index -> sitemap nesting allowed
+REQUEST_TIMEOUT = 30
+QUEUE_SIZE = 10_000        # records buffered between fetch threads and the consumer
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; sitemap-reader/1.0)"}
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+SitemapRecord = namedtuple("SitemapRecord", ["loc", "lastmod", "sitemap"])
+
+
+class _Done:
+    def __init__(self, children, depth):
+        self.children = children
+        self.depth = depth
+
+
+class _Stopped(Exception):
+    pass
+
+
+class _PrefixedReader(io.RawIOBase):
+    """File object that replays already-read bytes before the rest of the stream."""
+
+    def __init__(self, prefix, raw):
+        self.prefix = prefix
+        self.raw = raw
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if self.prefix:
+            if size is None or size < 0:
+                data, self.prefix = self.prefix + self.raw.read(), b""
+                return data
+            data, self.prefix = self.prefix[:size], self.prefix[size:]
+            return data
+        return self.raw.read(size if size is not None and size >= 0 else None)
+
+
+def _open_stream(session, url):
+    resp = session.get(url, stream=True, timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    resp.raw.decode_content = True        # undo Content-Encoding: gzip
+    stream = _PrefixedReader(resp.raw.read(2), resp.raw)
+    if stream.prefix == b"\x1f\x8b":      # .xml.gz served as a file
+        return resp, gzip.GzipFile(fileobj=stream)
+    return resp, stream
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_sitemap_stream(fileobj, sitemap_url, emit):
+    """Parse one sitemap/index from a file object.
+
+    Calls emit(SitemapRecord) for each <url>; returns (kind, child_sitemap_urls, count).
+    Only <loc>/<lastmod> in the sitemaps.org namespace directly under <url>/<sitemap> count,
+    so extension tags such as <image:loc> are ignored.
+    """
+    kind, children, count = None, [], 0
+    root = None
+    depth = 0
+    loc = lastmod = None
+    for event, elem in ET.iterparse(fileobj, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = elem
+                kind = "index" if _local_name(elem.tag) == "sitemapindex" else "urlset"
+            continue
+        depth -= 1
+        if depth == 2:             # root=0, <url>/<sitemap>=1, their fields=2
+            if elem.tag == SITEMAP_NS + "loc":
+                loc = (elem.text or "").strip()
+            elif elem.tag == SITEMAP_NS + "lastmod":
+                lastmod = (elem.text or "").strip() or None
+        elif depth == 1:
+            if loc and elem.tag in (SITEMAP_NS + "url", SITEMAP_NS + "sitemap"):
+                if elem.tag == SITEMAP_NS + "sitemap":
+                    children.append(loc)
+                else:
+                    emit(SitemapRecord(loc, lastmod, sitemap_url))
+                    count += 1
+            loc = lastmod = None
+            elem.clear()
+            root.clear()       # drop references to finished <url> elements
+    return kind, children, count
+
+
+def iter_sitemap(url, workers=WORKERS, stats=None, session=None, max_depth=MAX_DEPTH):
+    """Yield SitemapRecord for every URL reachable from a sitemap or sitemap index."""
+    session = session or requests.Session()
+    session.headers.update(HEADERS)
+    stats = stats if stats is not None else {}
+    records = queue.Queue(maxsize=QUEUE_SIZE)
+    stop = threading.Event()
+
+    def put(item):
+        while True:
+            if stop.is_set():
+                raise _Stopped()
+            try:
+                records.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def task(sitemap_url, depth):
+        started = time.perf_counter()
+        children = []
+        entry = {"kind": None, "urls": 0, "seconds": 0.0, "error": None}
+        try:
+            resp, stream = _open_stream(session, sitemap_url)
+            with resp:
+                entry["kind"], children, entry["urls"] = parse_sitemap_stream(stream, sitemap_url, put)
+        except _Stopped:
+            return
+        except Exception as e:   # any failure must still report _Done below
+            entry["error"] = str(e)
+        entry["seconds"] = round(time.perf_counter() - started, 3)
+        stats[sitemap_url] = entry
+        try:
+            put(_Done(children, depth))
+        except _Stopped:
+            pass
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending = 1
+    pool.submit(task, url, 0)
+    try:
+        while pending:
+            item = records.get()
+            if isinstance(item, _Done):
+                pending -= 1
+                if item.depth < max_depth:
+                    for child in item.children:
+                        pool.submit(task, child, item.depth + 1)
+                        pending += 1
+                continue
+            yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def print_stats(stats):
+    """Per-sitemap counts and parse timings."""
+    total = 0
+    for sitemap_url, entry in stats.items():
+        if entry["error"]:
+            print(f"  {sitemap_url}: ERROR {entry['error']}")
+            continue
+        label = "index" if entry["kind"] == "index" else f"{entry['urls']} URLs"
+        print(f"  {sitemap_url}: {label} in {entry['seconds']}s")
+        total += entry["urls"]
+    print(f"Total: {total} URLs from {len(stats)} sitemap files")
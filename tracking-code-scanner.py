@@ -1,4 +1,14 @@
-import requests, re
+import argparse
+import bisect
+import csv
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from http_cache import cached_get
+from page_extract import parse_page
 
 # === Regex pattern senarai tracking code ===
 patterns = {
@@ -13,6 +23,19 @@ patterns = {
     "Google Search Console": r"google-site-verification[\"']?\s*content=[\"'](.*?)['\"]"
 }
 
+# === Satu regex gabungan: semua pattern dicari dalam satu pass ===
+# Setiap pattern dibalut named group p0, p1, ...; group dalaman (ID) ikut selepasnya.
+COMBINED = re.compile("|".join(f"(?P<p{i}>{p})" for i, p in enumerate(patterns.values())))
+_NAMES = list(patterns)
+_VALUE_GROUP = {}
+for _i, _p in enumerate(patterns.values()):
+    _outer = COMBINED.groupindex[f"p{_i}"]
+    _VALUE_GROUP[f"p{_i}"] = _outer + 1 if re.compile(_p).groups else _outer
+EVENT_PATTERN = re.compile(r"dataLayer\.push\((.*?)\)")
+GTM_CONTAINER_URL = "https://www.googletagmanager.com/gtm.js?id={}"
+MAX_SCRIPTS = 20          # <script src> bundle yang di-scan setiap page
+SCRIPT_WORKERS = 8
+
 # === Tentukan origin berdasarkan konteks ===
 def detect_origin(line):
     if "googletagmanager" in line:
@@ -22,30 +45,81 @@ def detect_origin(line):
     else:
         return "Origin: Hardcoded"
 
+class LineIndex:
+    """Offset -> line lookup dalam O(log n), ganti html.splitlines() untuk setiap match."""
+
+    def __init__(self, text):
+        self.text = text
+        self.starts = [0] + [m.end() for m in re.finditer("\n", text)]
+
+    def line_at(self, offset):
+        i = bisect.bisect_right(self.starts, offset) - 1
+        end = self.starts[i + 1] - 1 if i + 1 < len(self.starts) else len(self.text)
+        return self.text[self.starts[i]:end]
+
+def scan_text(text, origin=None):
+    """Return {pattern name: {id: origin}} for one HTML/JS text, in one pass."""
+    found = {}
+    lines = LineIndex(text) if origin is None else None
+    for m in COMBINED.finditer(text):
+        key = m.lastgroup
+        value = m.group(_VALUE_GROUP[key])
+        name = _NAMES[int(key[1:])]
+        found.setdefault(name, {}).setdefault(value, origin or detect_origin(lines.line_at(m.start())))
+    return found
+
+def fetch_script(url):
+    """External JS (cached on disk and shared across sites); "" when it can't be fetched."""
+    try:
+        response = cached_get(url, timeout=10)
+        return response.text if response.status_code == 200 else ""
+    except requests.exceptions.RequestException:
+        return ""
+
+def fetch_gtm_container(container_id):
+    """GTM container JS (cached on disk and shared across sites)."""
+    return fetch_script(GTM_CONTAINER_URL.format(container_id))
+
+def merge_found(found, more):
+    """Tambah hasil scan lain ke found; origin pertama yang dijumpai dikekalkan."""
+    for name, ids in more.items():
+        for value, origin in ids.items():
+            found.setdefault(name, {}).setdefault(value, origin)
+
 # === Fungsi utama untuk scan ===
-def detect_tracking(url):
+def detect_tracking(url, scan_gtm=True, verbose=True, scan_scripts=True):
     if not url.startswith("http"):
         url = "https://" + url.strip()
-    print(f"\n🔍 Scanning {url} ...\n")
+    if verbose:
+        print(f"\n🔍 Scanning {url} ...\n")
 
     try:
         response = requests.get(url, timeout=10)
         html = response.text
 
+        found = scan_text(html)
+        # Tag yang di-inject dalam container GTM tak nampak dalam HTML: scan container juga
+        if scan_gtm:
+            for container_id in list(found.get("Google Tag Manager", {})):
+                merge_found(found, scan_text(fetch_gtm_container(container_id),
+                                             origin=f"Origin: GTM container {container_id}"))
+        # Begitu juga tag dalam bundle <script src> (plugin, theme, pihak ketiga)
+        if scan_scripts:
+            scripts = [s for s in dict.fromkeys(parse_page(html, base_url=response.url).scripts)
+                       if s.startswith("http")][:MAX_SCRIPTS]
+            with ThreadPoolExecutor(max_workers=SCRIPT_WORKERS) as pool:
+                for src, js in zip(scripts, pool.map(fetch_script, scripts)):
+                    merge_found(found, scan_text(js, origin=f"Origin: script {src}"))
+
         results = {}
-        for name, pattern in patterns.items():
-            matches = re.findall(pattern, html)
-            if matches:
-                # Cari line yang mengandungi match → kesan origin
-                for match in matches:
-                    match_line = next((l for l in html.splitlines() if match in l), "")
-                    origin = detect_origin(match_line)
-                    results[name] = f"✅ {', '.join(matches)} ({origin})"
+        for name in patterns:
+            if name in found:
+                results[name] = "✅ " + ", ".join(f"{v} ({o})" for v, o in found[name].items())
             else:
                 results[name] = "❌"
 
         # Detect dataLayer.push event
-        events = re.findall(r"dataLayer\.push\((.*?)\)", html)
+        events = EVENT_PATTERN.findall(html)
         if events:
             results["Event Push Found"] = f"✅ {len(events)} event(s) found"
             results["Sample Events"] = events[:3]
@@ -57,11 +131,42 @@ def detect_tracking(url):
     except Exception as e:
         return {"Error": str(e)}
 
+def scan_many(sites, output, workers=32):
+    """Scan many sites concurrently and stream each result to CSV or JSONL as it finishes."""
+    as_jsonl = output.endswith(".jsonl")
+    fields = ["site"] + list(patterns) + ["Event Push Found", "Sample Events", "Error"]
+    with open(output, "w", newline="", encoding="utf-8") as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        writer = None if as_jsonl else csv.DictWriter(f, fieldnames=fields)
+        if writer:
+            writer.writeheader()
+        futures = {pool.submit(detect_tracking, site, True, False): site for site in sites}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            row = {"site": futures[fut], **fut.result()}
+            if as_jsonl:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            else:
+                row["Sample Events"] = json.dumps(row.get("Sample Events", []), ensure_ascii=False)
+                writer.writerow(row)
+            f.flush()
+            print(f"[{done}/{len(futures)}] {futures[fut]}", file=sys.stderr)
+
 # === Main Execution ===
 if __name__ == "__main__":
-    website = input("🌐 Masukkan URL website: ")
-    result = detect_tracking(website)
+    parser = argparse.ArgumentParser(description="Scan tracking codes on one site or many")
+    parser.add_argument("--input", help="Fail senarai domain/URL (satu per baris) untuk batch mode")
+    parser.add_argument("--output", default="tracking_results.csv", help=".csv atau .jsonl")
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            sites = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+        scan_many(sites, args.output, workers=args.workers)
+        print(f"\n✅ {len(sites)} site disimpan ke {args.output}")
+    else:
+        website = input("🌐 Masukkan URL website: ")
+        result = detect_tracking(website)
 
-    print("\n📊 Tracking Results:\n")
-    for key, value in result.items():
-        print(f"{key}: {value}")
+        print("\n📊 Tracking Results:\n")
+        for key, value in result.items():
+            print(f"{key}: {value}")
@@ -1,45 +1,120 @@
-import requests
+import asyncio
+import csv
+import os
+import random
+from urllib.parse import urlsplit
+
+import aiohttp
 import pandas as pd
 from tqdm import tqdm
-import os
 
 # === SETTING FILE PATH ===
 input_file = r"C:\xxxx.csv"
 output_file = os.path.join(os.path.dirname(input_file), "url_check_results.csv")
 
-# === BACA CSV ===
-df = pd.read_csv(input_file)
+# === SETTING CONCURRENCY ===
+TOTAL_CONCURRENCY = 200   # jumlah request serentak (semua host)
+PER_HOST_LIMIT = 8        # had connection serentak untuk satu host
+REQUEST_TIMEOUT = 10      # saat, dikira selepas dapat slot host (masa menunggu giliran tak dikira)
+MAX_RETRIES = 3           # cubaan semula untuk timeout / 429 / 5xx
+BACKOFF_BASE = 0.5        # saat, digandakan setiap cubaan
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; url-status-checker/2.0)"}
+
+
+def status_label(code):
+    """Tukar status code kepada label yang sama macam versi asal."""
+    if code == 200:
+        return "✅ Valid"
+    if code == 404:
+        return "❌ 404 Not Found"
+    return f"⚠️ {code}"
 
-# Cuba detect column yang ada URL
-colname = None
-for c in df.columns:
-    if c.lower() in ["url", "urls", "link", "links", "website", "page"]:
-        colname = c
-        break
 
-if not colname:
-    raise ValueError("❌ Tiada column bernama 'url', 'link', atau 'website' dalam CSV!")
+async def _request_status(session, method, url):
+    async with session.request(method, url, allow_redirects=True) as response:
+        # Untuk GET kita tak perlu body, cukup header sahaja
+        return response.status
 
-urls = df[colname].dropna().tolist()
-results = []
 
-# === CHECK URL SATU-SATU ===
-for url in tqdm(urls, desc="Checking URLs"):
+def host_slot(slots, url):
+    """Semaphore satu host: request beratur di sini, bukan dalam connection pool (di mana
+    masa menunggu turut dikira dalam ClientTimeout total)."""
     try:
-        response = requests.head(url, allow_redirects=True, timeout=5)
-        code = response.status_code
-        if code == 200:
-            status = "✅ Valid"
-        elif code == 404:
-            status = "❌ 404 Not Found"
-        else:
-            status = f"⚠️ {code}"
-    except requests.exceptions.RequestException:
-        code = "Error"
-        status = "⚠️ Invalid / Timeout"
-    results.append({"URL": url, "Status Code": code, "Status": status})
-
-# === SIMPAN KE CSV ===
-out_df = pd.DataFrame(results)
-out_df.to_csv(output_file, index=False, encoding="utf-8-sig")
-print(f"\n✅ Selesai! Hasil disimpan ke:\n{output_file}")
+        host = (urlsplit(url).hostname or "").lower()
+    except ValueError:       # URL rosak: aiohttp akan laporkan sebagai error
+        host = ""
+    return slots.setdefault(host, asyncio.Semaphore(PER_HOST_LIMIT))
+
+
+async def check_url(session, url, slots=None):
+    """HEAD dulu, fallback ke GET kalau server tolak HEAD (405/501). Retry dengan backoff."""
+    method = "HEAD"
+    slot = host_slot(slots if slots is not None else {}, url)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with slot:
+                code = await _request_status(session, method, url)
+                if code in (405, 501) and method == "HEAD":
+                    method = "GET"
+                    code = await _request_status(session, method, url)
+            if code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return {"URL": url, "Status Code": code, "Status": status_label(code)}
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == MAX_RETRIES:
+                break
+        await asyncio.sleep(BACKOFF_BASE * (2 ** attempt) + random.uniform(0, BACKOFF_BASE))
+    return {"URL": url, "Status Code": "Error", "Status": "⚠️ Invalid / Timeout"}
+
+
+async def check_all(urls, out_path):
+    """Semak semua URL serentak dan tulis hasil ke CSV sebaik sahaja siap."""
+    queue = asyncio.Queue(maxsize=TOTAL_CONCURRENCY * 2)
+    connector = aiohttp.TCPConnector(limit=TOTAL_CONCURRENCY, limit_per_host=PER_HOST_LIMIT,
+                                     ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    slots = {}
+
+    with open(out_path, "w", newline="", encoding="utf-8-sig") as f, \
+            tqdm(total=len(urls), desc="Checking URLs") as pbar:
+        writer = csv.DictWriter(f, fieldnames=["URL", "Status Code", "Status"])
+        writer.writeheader()
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+            async def worker():
+                while True:
+                    url = await queue.get()
+                    if url is None:
+                        queue.task_done()
+                        return
+                    writer.writerow(await check_url(session, url, slots))
+                    pbar.update(1)
+                    queue.task_done()
+
+            workers = [asyncio.create_task(worker()) for _ in range(TOTAL_CONCURRENCY)]
+            for url in urls:
+                await queue.put(url)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+
+if __name__ == "__main__":
+    # === BACA CSV ===
+    df = pd.read_csv(input_file)
+
+    # Cuba detect column yang ada URL
+    colname = None
+    for c in df.columns:
+        if c.lower() in ["url", "urls", "link", "links", "website", "page"]:
+            colname = c
+            break
+
+    if not colname:
+        raise ValueError("❌ Tiada column bernama 'url', 'link', atau 'website' dalam CSV!")
+
+    urls = df[colname].dropna().tolist()
+
+    # === CHECK URL SERENTAK, HASIL DISTREAM TERUS KE CSV ===
+    asyncio.run(check_all(urls, output_file))
+    print(f"\n✅ Selesai! Hasil disimpan ke:\n{output_file}")
@@ -1,8 +1,13 @@
 import requests
 from PIL import Image
 from io import BytesIO
+import csv
+import hashlib
+import json
 import os
 import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from itertools import islice
 from urllib.parse import urlparse
 
 # ===== CONFIG =====
@@ -10,34 +15,150 @@ output_folder = "folder-name"
 urls = [
     "https://your-url.com/wp-content/uploads/",
     "https://your-url.com/",
-  
-]
 
-# Make output folder
-os.makedirs(output_folder, exist_ok=True)
+]
+QUALITY = 90
+MAX_DIMENSION = None          # e.g. 1920 to downscale larger images (None = keep size)
+DOWNLOAD_WORKERS = 16         # threads: network bound
+ENCODE_WORKERS = os.cpu_count() or 1   # processes: CPU bound
+MAX_PENDING_DOWNLOADS = DOWNLOAD_WORKERS * 2   # downloaded bytes waiting in memory are bounded ...
+MAX_PENDING_ENCODES = ENCODE_WORKERS * 2       # ... and so are images queued for the encoders
+SKIP_EXTENSIONS = (".svg", ".svgz", ".ico")   # Pillow can't (usefully) convert these
+MANIFEST = os.path.join(output_folder, ".webp_manifest.json")   # source hash + ETag per output
+SUMMARY_CSV = os.path.join(output_folder, "webp_summary.csv")
 
 def safe_filename(url):
-    """Extract filename safely from URL and append .webp"""
-    path = urlparse(url).path
-    filename = os.path.basename(path)
+    """Extract filename safely from URL and append .webp
+
+    A short hash of host + path keeps same-named images from different folders apart.
+    """
+    parts = urlparse(url)
+    filename = os.path.basename(parts.path)
     filename = re.sub(r'[^a-zA-Z0-9._-]', '_', filename)  # clean
-    return filename + ".webp"  # keep original + add .webp
+    tag = hashlib.sha1((parts.netloc + parts.path).encode("utf-8")).hexdigest()[:8]
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}-{tag}{ext}.webp"  # keep original name + hash + add .webp
 
-# Download & convert
-for i, url in enumerate(urls, 1):
-    try:
-        r = requests.get(url, timeout=10)
+def download(session, url, known):
+    """Fetch one image; checks extension and Content-Type before reading the body.
+
+    Returns (status, data, etag). status is 'ok', 'unchanged' or a skip reason.
+    """
+    if urlparse(url).path.lower().endswith(SKIP_EXTENSIONS):
+        return "skipped: unsupported extension", None, None
+    headers = {"If-None-Match": known["etag"]} if known.get("etag") else {}
+    with session.get(url, timeout=30, stream=True, headers=headers) as r:
+        if r.status_code == 304:
+            return "unchanged", None, known.get("etag")
         r.raise_for_status()
+        content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if not content_type.startswith("image/") or "svg" in content_type:
+            return f"skipped: {content_type or 'no content type'}", None, None
+        return "ok", r.content, r.headers.get("ETag")
+
+def encode_webp(data, output_path, quality=QUALITY, max_dimension=MAX_DIMENSION):
+    """Runs in a worker process. Returns (webp_bytes, width, height)."""
+    img = Image.open(BytesIO(data))
+    if max_dimension:
+        # JPEG draft mode decodes at 1/2, 1/4 or 1/8 scale: much cheaper than full decode + resize
+        img.draft("RGB", (max_dimension, max_dimension))
+        img.thumbnail((max_dimension, max_dimension), reducing_gap=2.0)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+    img.save(output_path, "WEBP", quality=quality, method=4)
+    return os.path.getsize(output_path), img.width, img.height
+
+def load_manifest():
+    try:
+        with open(MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def convert_all(urls):
+    manifest = load_manifest()
+    rows = []
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=DOWNLOAD_WORKERS, pool_maxsize=DOWNLOAD_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as downloads, \
+            ProcessPoolExecutor(max_workers=ENCODE_WORKERS) as encoders:
+        todo = iter(urls)
+        fetches, encodes = {}, {}
+
+        def fetch_more():
+            for url in islice(todo, MAX_PENDING_DOWNLOADS - len(fetches)):
+                name = safe_filename(url)
+                known = manifest.get(name, {}) if os.path.exists(os.path.join(output_folder, name)) else {}
+                fetches[downloads.submit(download, session, url, known)] = (url, name, known)
+
+        def collect(done):
+            for fut in done:
+                row, name, digest, etag = encodes.pop(fut)
+                try:
+                    webp_bytes, width, height = fut.result()
+                except Exception as e:
+                    row["status"] = f"failed: {e}"
+                else:
+                    saved = row["source_bytes"] - webp_bytes
+                    row.update(status="converted", webp_bytes=webp_bytes, saved_bytes=saved,
+                               saved_pct=round(100 * saved / row["source_bytes"], 1) if row["source_bytes"] else "",
+                               width=width, height=height)
+                    manifest[name] = {"sha256": digest, "etag": etag}
+                    print(f"Saved {row['output']} ({saved:+,} bytes saved)")
+                rows.append(row)
+
+        fetch_more()
+        while fetches:
+            done, _ = wait(fetches, return_when=FIRST_COMPLETED)
+            for fut in done:
+                url, name, known = fetches.pop(fut)
+                output_path = os.path.join(output_folder, name)
+                row = {"url": url, "output": output_path, "status": "", "source_bytes": "", "webp_bytes": "",
+                       "saved_bytes": "", "saved_pct": "", "width": "", "height": ""}
+                try:
+                    status, data, etag = fut.result()
+                except Exception as e:
+                    row["status"] = f"failed: {e}"
+                    rows.append(row)
+                    continue
+                if status != "ok":
+                    row["status"] = status
+                    rows.append(row)
+                    continue
+                digest = hashlib.sha256(data).hexdigest()
+                if known.get("sha256") == digest:
+                    row["status"] = "unchanged"
+                    manifest[name] = dict(known, etag=etag)
+                    rows.append(row)
+                    continue
+                row["source_bytes"] = len(data)
+                # Bounded: wait for an encode to finish before queueing more image data
+                if len(encodes) >= MAX_PENDING_ENCODES:
+                    collect(wait(encodes, return_when=FIRST_COMPLETED).done)
+                encodes[encoders.submit(encode_webp, data, output_path)] = (row, name, digest, etag)
+            fetch_more()
+
+        collect(list(as_completed(encodes)))
+
+    with open(MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return rows
 
-        if url.lower().endswith(".svg"):
-            print(f"[{i}] Skipped SVG (not supported by Pillow): {url}")
-            continue
+if __name__ == "__main__":
+    # Make output folder
+    os.makedirs(output_folder, exist_ok=True)
 
-        img = Image.open(BytesIO(r.content))
-        output_path = os.path.join(output_folder, safe_filename(url))
+    # Download & convert
+    rows = convert_all(urls)
 
-        img.save(output_path, "WEBP", quality=90)
-        print(f"[{i}] Saved {output_path}")
+    with open(SUMMARY_CSV, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["url"])
+        writer.writeheader()
+        writer.writerows(rows)
 
-    except Exception as e:
-        print(f"[{i}] Failed {url}: {e}")
+    converted = [r for r in rows if r["status"] == "converted"]
+    total_saved = sum(r["saved_bytes"] for r in converted)
+    print(f"\nConverted {len(converted)}/{len(rows)} images, saved {total_saved:,} bytes → {SUMMARY_CSV}")